@@ -1,72 +1,291 @@
 import streamlit as st
-import easyocr
-import numpy as np
-import pdfplumber
-import docx
-from docx import Document
-from pptx import Presentation
-from PIL import Image
-from googletrans import Translator
-from transformers import pipeline
-import io
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from cache import TieredCache, content_hash, DEFAULT_CACHE_DIR
+from document import Document
+from embeddings import focus_text, open_store
+from export import export_file, export_key
+from incremental import IncrementalSummarizer, IncrementalTranslator
+from extraction import iter_extract, make_process_pool
+from ocr import OcrQueue
+from preprocess import PreprocessConfig
+from translate import BACKENDS
+from jobs import JobManager, DONE, FAILED
+import models
+import tracing
+from pipeline import extraction_key
+from search_index import SearchIndex
+from storage import UploadStore
+
+# الحد الزمني للتلخيص بالثواني؛ بعده تُختصر الأجزاء المتبقية بدون النموذج
+SUMMARY_TIME_BUDGET = 120
+# عدد الأحرف المعروضة من آخر النص أثناء الاستخراج
+PREVIEW_CHARS = 5000
+# عدد المهام الثقيلة (استخراج/تلخيص/ترجمة) التي تعمل معاً لكل المستخدمين
+JOB_WORKERS = int(os.environ.get("UNIBRAIN_JOB_WORKERS", "2"))
+# كل كم ثانية تتحقق الواجهة من تقدم المهمة
+JOB_POLL_SECONDS = 1
 
 # --- 1. إعدادات الصفحة ---
 st.set_page_config(page_title="UniBrain Pro Max", layout="wide", page_icon="🧠")
 
-# --- 2. تحميل النماذج والذكاء الاصطناعي (مرة واحدة فقط) ---
+# --- 2. النماذج والذكاء الاصطناعي ---
+# كل نموذج يُحمّل عند أول استخدام فقط (انظر models.py) ويبقى مشتركاً بين الجلسات
+
 @st.cache_resource
-def load_all_models():
-    # تحميل قارئ الصور
-    reader = easyocr.Reader(['ar', 'en'])
-    # تحميل الملخص (استخدام نسخة خفيفة للسيرفرات المجانية)
-    summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-    # تحميل المترجم
-    translator = Translator()
-    return reader, summarizer, translator
+def get_extraction_cache():
+    # كاش مشترك بين الجلسات: ذاكرة + قرص (يبقى بعد إعادة تشغيل السيرفر)
+    return TieredCache(os.path.join(DEFAULT_CACHE_DIR, "extraction"))
 
-# استدعاء النماذج
-try:
-    reader, summarizer, translator = load_all_models()
-except Exception as e:
-    st.error(f"فشل تحميل نماذج الذكاء الاصطناعي: {e}")
+@st.cache_resource
+def get_summary_cache():
+    # ملخصات الأجزاء: الجزء الذي لم يتغير لا يُلخص مرتين
+    return TieredCache(os.path.join(DEFAULT_CACHE_DIR, "summaries"), disk_bytes=256 * 1024 * 1024)
+
+@st.cache_resource
+def get_translation_cache():
+    # ترجمة كل جملة تُحفظ، فلا تُترجم الجملة نفسها مرتين
+    return TieredCache(os.path.join(DEFAULT_CACHE_DIR, "translations"), disk_bytes=256 * 1024 * 1024)
+
+@st.cache_resource
+def get_translator(backend):
+    # "marian" محلي بدون إنترنت، و"google" يعتمد على googletrans
+    return BACKENDS[backend](cache=get_translation_cache())
+
+@st.cache_resource
+def get_search_index():
+    # فهرس البحث على القرص: كل ما استُخرج من قبل، من كل الجلسات
+    return SearchIndex()
+
+@st.cache_resource
+def get_process_pool():
+    # pdfplumber ومحللات Word/PowerPoint تعمل في عمليات منفصلة بعدد أنوية المعالج
+    return make_process_pool()
+
+@st.cache_resource
+def get_ocr_queue():
+    # طابور OCR محدود ومستقل عن الـ pool لأن القارئ لا يمكن نقله بين العمليات
+    # نمرر دالة التحميل وليس القارئ: EasyOCR لا يُحمّل إلا عند وصول أول صورة
+    # readers: قارئ بلغة واحدة للصور التي كلها بخط واحد (انظر models.ReaderPool)
+    return OcrQueue(models.get_reader, preprocess=PreprocessConfig(), readers=models.get_reader_pool())
 
 # --- 3. الدوال البرمجية (Functions) ---
 
-def extract_text_from_file(file):
-    """دالة واحدة لاستخراج النص من جميع أنواع الملفات"""
-    text = ""
-    file_name = file.name.lower()
-    try:
-        if file_name.endswith(('png', 'jpg', 'jpeg')):
-            img = Image.open(file)
-            res = reader.readtext(np.array(img), detail=0)
-            text = " ".join(res)
-        elif file_name.endswith('pdf'):
-            with pdfplumber.open(file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text: text += page_text + "\n"
-        elif file_name.endswith('docx'):
-            doc = docx.Document(file)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        elif file_name.endswith('pptx'):
-            prs = Presentation(file)
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
-    except Exception as e:
-        st.error(f"خطأ في قراءة {file_name}: {e}")
-    return text
+# --- مهام الخلفية: تعمل في خيوط JobManager وليس في خيط السكربت، فلا تستخدم st ---
+
+def run_extraction_job(payload, report):
+    """استخراج الملفات غير الموجودة في الكاش مع تحديث التقدم والنص الجزئي"""
+    names, keys, missing = payload["names"], payload["keys"], payload["missing"]
+    # لكل ملف قائمة أجزائه (رقم، نص، meta)؛ None للملفات التي لم تنته بعد
+    files = list(payload["files"])
+    units = {i: [] for i in missing}
+    errors = {}
+    finished, pages, last_report = 0, 0, 0.0
+    for record in iter_extract(payload["jobs"], payload["pool"], payload["ocr"]):
+        i = missing[record.file]
+        if record.error is not None:
+            errors.setdefault(i, record.error)
+        elif record.text is not None:
+            units[i].append((record.unit, record.text, record.meta))
+            pages += 1
+        else:
+            finished += 1
+            files[i] = [] if i in errors else units.pop(i)
+        # تحديث الجدول كل نصف ثانية على الأكثر
+        if time.monotonic() - last_report > 0.5:
+            last_report = time.monotonic()
+            partial = [u if u is not None else units.get(j, []) for j, u in enumerate(files)]
+            report(finished / len(missing), f"تم استخراج {finished} من {len(missing)} ملف ({pages} صفحة/شريحة)",
+                   partial=Document.from_files(names, partial).text[-PREVIEW_CHARS:])
+    for i in missing:
+        if i not in errors:
+            payload["cache"].set(keys[i], files[i])
+    return {
+        "files": files,
+        "errors": {i: str(e) for i, e in errors.items()},
+        "broken_pool": any(isinstance(e, BrokenProcessPool) for e in errors.values()),
+    }
+
+def focused_text(payload, report):
+    """النص كاملاً، أو الأجزاء الأقرب إلى الموضوع فقط إذا حدده المستخدم"""
+    if not payload.get("topic"):
+        return payload["text"]
+    report(0.0, "جاري اختيار الأجزاء الأقرب إلى الموضوع...")
+    embedder = models.get_embedder()
+    return focus_text(payload["text"], payload["topic"], embedder, open_store(embedder.dim))
+
+def run_summary_job(payload, report):
+    text = focused_text(payload, report)
+    report(0.0, "جاري تحميل نموذج التلخيص...")
+    summarizer = models.get_summarizer()
+    def on_progress(done, total, level):
+        report(done / total, f"المرحلة {level}: تم تلخيص {done} من {total} جزء")
+    # تلخيص المستند كاملاً على أجزاء، مع حد زمني حتى لا يطول الانتظار؛
+    # بعد تعديل النص لا يُلخص من جديد إلا ما تغير منذ النسخة السابقة
+    incremental = payload["incremental"]
+    summary = incremental.summarize(summarizer, text, max_length=150, min_length=40,
+                                    time_budget=SUMMARY_TIME_BUDGET, on_progress=on_progress)
+    return {"text": summary, "changed": incremental.changed, "total": incremental.total}
+
+def run_translation_job(payload, report):
+    text = focused_text(payload, report)
+    def on_progress(done, total):
+        report(done / total, f"تمت ترجمة {done} من {total} جملة")
+    incremental = payload["incremental"]
+    translation = incremental.translate(payload["translator"], text, payload["dest"], on_progress=on_progress)
+    return {"text": translation, "changed": incremental.changed, "total": incremental.total}
 
-def create_docx_file(text):
-    """تحويل النص إلى ملف Word"""
-    doc = Document()
-    doc.add_paragraph(text)
-    bio = io.BytesIO()
-    doc.save(bio)
-    return bio.getvalue()
+@st.cache_resource
+def get_job_manager():
+    # جدول المهام على القرص وعمال مشتركون بين كل الجلسات
+    manager = JobManager(os.path.join(DEFAULT_CACHE_DIR, "jobs.sqlite3"), max_workers=JOB_WORKERS)
+    manager.register("extract", run_extraction_job)
+    manager.register("summarize", run_summary_job)
+    manager.register("translate", run_translation_job)
+    return manager
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job(job_id):
+    """عرض تقدم مهمة جارية؛ هذا الجزء فقط يُعاد كل ثانية حتى تنتهي المهمة"""
+    job = get_job_manager().get(job_id)
+    if job is None or job["status"] in (DONE, FAILED):
+        st.rerun()
+    st.progress(job["progress"], text=job["message"] or "في انتظار دورها...")
+    if job["partial"]:
+        st.text(job["partial"])
+
+def finished_job(job_id):
+    """المهمة إذا انتهت (نجحت أو فشلت)، وإلا يُعرض تقدمها وتعاد None"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        # حُذفت المهمة من الجدول (تنظيف المهام القديمة)
+        return {"status": FAILED, "error": "المهمة غير موجودة، أعد المحاولة"}
+    if job["status"] in (DONE, FAILED):
+        return job
+    poll_job(job_id)
+    return None
+
+def get_incremental(kind):
+    """نتائج آخر تلخيص/ترجمة في هذه الجلسة، لإعادة استخدامها بعد تعديل النص"""
+    key = f"incremental_{kind}"
+    if key not in st.session_state:
+        if kind == "summary":
+            st.session_state[key] = IncrementalSummarizer(cache=get_summary_cache())
+        else:
+            st.session_state[key] = IncrementalTranslator()
+    return st.session_state[key]
+
+def show_rerun_count(result, action):
+    """كم جزءاً مر على النموذج في آخر تشغيل (الباقي من نتائج النسخة السابقة)"""
+    if result["changed"] < result["total"]:
+        st.caption(f"أُعيد {action} {result['changed']} من {result['total']} جزء فقط، والباقي من النسخة السابقة")
+
+def get_upload_store():
+    """ملفات الجلسة: الصغيرة في الذاكرة ضمن ميزانية الجلسة، والباقي على القرص"""
+    if 'upload_store' not in st.session_state:
+        store = st.session_state.upload_store = UploadStore()
+        store.prune()
+    return st.session_state.upload_store
+
+def store_uploads(uploaded_files):
+    """نسخ الملفات المرفوعة إلى مخزن الجلسة (بدل getvalue المتكرر لكل ملف)"""
+    store = get_upload_store()
+    store.clear()
+    return [store.add(f.name, f) for f in uploaded_files]
+
+def submit_extraction(files):
+    """إرسال مهمة استخراج للملفات غير الموجودة في الكاش؛ تعيد None إذا كانت كلها في الكاش
+
+    files: قائمة storage.StoredFile؛ الملفات على القرص تُمرر للعمال كمسارات.
+    """
+    cache = get_extraction_cache()
+    names = [f.name for f in files]
+    keys, units, missing = [], [], []
+    for i, f in enumerate(files):
+        keys.append(extraction_key(f.name, f.sha256))
+        units.append(cache.get(keys[-1]))
+        if units[-1] is None:
+            missing.append(i)
+
+    tracing.cache_result("extraction", hits=len(files) - len(missing), misses=len(missing))
+    # الملفات الموجودة في الكاش لا يعاد استخراجها
+    if not missing:
+        st.session_state.document = Document.from_files(names, units)
+        return None
+    payload = {
+        "names": names, "keys": keys, "files": units, "missing": missing,
+        "jobs": [(files[i].name, files[i].source) for i in missing],
+        "cache": cache, "pool": get_process_pool(), "ocr": get_ocr_queue(),
+    }
+    # نفس الملفات = نفس المهمة، حتى بعد تحديث الصفحة أو من مستخدم آخر
+    return get_job_manager().submit("extract", payload, key=content_hash("|".join(keys), "extract"))
+
+def export_button(text, fmt, label, file_name):
+    """زر تجهيز الملف أولاً ثم زر التحميل؛ الملف لا يُبنى عند كل إعادة تشغيل للسكربت"""
+    key = export_key(text, fmt)
+    state_key = f"export_{fmt}"
+    ready = st.session_state.get(state_key)
+    if ready is None or ready[0] != key or not os.path.exists(ready[1]):
+        if not st.button(f"⚙️ تجهيز {label}", key=f"prepare_{fmt}"):
+            return
+        with st.spinner("جاري تجهيز الملف..."):
+            ready = st.session_state[state_key] = (key, export_file(text, fmt, key))
+    with open(ready[1], "rb") as fh:
+        st.download_button(f"📥 تحميل {label}", data=fh, file_name=file_name)
+
+def selected_text(document, final_text, key):
+    """النص كاملاً، أو ملفات مختارة فقط (من المقاطع مباشرة) إذا لم يُعدّل النص يدوياً"""
+    files = document.files()
+    if final_text != document.text or len(files) < 2:
+        return final_text
+    chosen = st.multiselect("الملفات:", range(len(files)), default=range(len(files)), key=key,
+                            format_func=lambda i: files[i].meta["name"])
+    if len(chosen) == len(files):
+        return final_text
+    return document.render({files[i].file for i in chosen})
+
+def index_document(document, files):
+    """إضافة صفحات الملفات المرفوعة إلى فهرس البحث (الملف المفهرس من قبل يُتخطى)"""
+    index = get_search_index()
+    for span in document.files():
+        if span.meta.get("error"):
+            continue
+        units = [(u.unit, document.slice(u), u.meta) for u in document.units(span.file)]
+        index.add(files[span.file].sha256, span.meta["name"], units)
+
+def show_search():
+    """البحث في كل المحاضرات المفهرسة مع موقع كل نتيجة"""
+    index = get_search_index()
+    query = st.text_input("ابحث في كل المحاضرات:", placeholder="مثال: تعريف الإنتروبيا")
+    if query:
+        start = time.perf_counter()
+        hits = index.search(query)
+        st.caption(f"{len(hits)} نتيجة في {(time.perf_counter() - start) * 1000:.0f} ms")
+        labels = {"page": "صفحة", "slide": "شريحة", "paragraph": "فقرة", "image": "صورة"}
+        for hit in hits:
+            st.markdown(f"**{hit.name}** — {labels.get(hit.kind, hit.kind)} {hit.unit + 1}")
+            st.markdown(hit.snippet)
+    files = index.files()
+    with st.expander(f"الملفات المفهرسة ({len(files)})"):
+        if files:
+            chosen = st.selectbox("ملف:", files, format_func=lambda f: f"{f[1]} ({f[2]} جزء)")
+            if st.button("🗑️ حذف من الفهرس"):
+                index.delete(chosen[0])
+                st.rerun()
+
+def show_performance_panel():
+    """زمن كل مرحلة وإصابات الكاش منذ تشغيل السيرفر (لكل المستخدمين)"""
+    rows, caches = tracing.TRACER.summary()
+    if not rows:
+        st.caption("لا توجد قياسات بعد.")
+    else:
+        st.dataframe(rows, hide_index=True)
+    for name, c in caches.items():
+        rate = f"{c['hit_rate']:.0%}" if c["hit_rate"] is not None else "-"
+        st.caption(f"كاش {name}: {c['hits']} إصابة / {c['misses']} إخفاق ({rate})")
+    st.download_button("📥 تحميل المقاييس (Prometheus)", data=tracing.TRACER.prometheus(),
+                       file_name="unibrain_metrics.prom", mime="text/plain")
 
 # --- 4. واجهة المستخدم (UI) ---
 
@@ -81,59 +300,119 @@ with st.sidebar:
         accept_multiple_files=True
     )
     st.write("---")
+    if st.checkbox("📊 لوحة الأداء"):
+        show_performance_panel()
     st.caption("برمجة وتطوير UniBrain AI")
 
 # --- 5. منطق المعالجة ---
 
 if uploaded_files:
     # تخزين النص في 'session_state' لمنع إعادة المعالجة عند كل ضغطة زر
-    if 'combined_text' not in st.session_state or st.session_state.get('last_upload_id') != len(uploaded_files):
-        all_text = ""
-        with st.spinner('جاري استخراج النصوص من الملفات...'):
-            for f in uploaded_files:
-                all_text += f"\n\n--- ملف: {f.name} ---\n"
-                all_text += extract_text_from_file(f)
-        st.session_state.combined_text = all_text
-        st.session_state.last_upload_id = len(uploaded_files)
+    # المعرّف يعتمد على محتوى الملفات وليس عددها، فاستبدال ملف بآخر يعيد المعالجة
+    upload_id = tuple((f.name, f.file_id) for f in uploaded_files)
+    if st.session_state.get('last_upload_id') != upload_id:
+        st.session_state.pop('document', None)
+        st.session_state.uploads = store_uploads(uploaded_files)
+        st.session_state.extract_job = submit_extraction(st.session_state.uploads)
+        st.session_state.last_upload_id = upload_id
+
+    if 'document' not in st.session_state:
+        # الاستخراج يعمل في الخلفية ويستمر حتى لو أعيد تشغيل السكربت
+        job = finished_job(st.session_state.extract_job)
+        if job is None:
+            st.stop()
+        if job["status"] == FAILED:
+            st.error(f"فشل استخراج النصوص: {job['error']}")
+            st.stop()
+        result = job["result"]
+        if result["broken_pool"]:
+            # عملية فرعية انهارت (نفاد ذاكرة مثلاً): نبني pool جديداً للمرة القادمة
+            get_process_pool.clear()
+        for i, error in result["errors"].items():
+            st.error(f"خطأ في قراءة {uploaded_files[i].name.lower()}: {error}")
+        metas = [{"error": result["errors"][i]} if i in result["errors"] else None for i in range(len(uploaded_files))]
+        st.session_state.document = Document.from_files([f.name for f in uploaded_files], result["files"], metas)
+
+    if st.session_state.get('indexed_upload_id') != upload_id:
+        index_document(st.session_state.document, st.session_state.uploads)
+        st.session_state.indexed_upload_id = upload_id
 
     # عرض النتائج في تبويبات منظمة
-    tab_text, tab_ai, tab_trans = st.tabs(["📝 النص المستخرج", "🤖 تلخيص ذكي", "🌐 ترجمة"])
+    tab_text, tab_ai, tab_trans, tab_search = st.tabs(["📝 النص المستخرج", "🤖 تلخيص ذكي", "🌐 ترجمة", "🔎 بحث"])
 
     with tab_text:
         st.subheader("مراجعة النص")
-        final_text = st.text_area("النص المستخرج (يمكنك التعديل):", st.session_state.combined_text, height=400)
+        final_text = st.text_area("النص المستخرج (يمكنك التعديل):", st.session_state.document.text, height=400)
         
         col_down1, col_down2 = st.columns(2)
         with col_down1:
-            st.download_button("📥 تحميل كملف Word", data=create_docx_file(final_text), file_name="UniBrain_Text.docx")
+            export_button(final_text, "docx", "كملف Word", "UniBrain_Text.docx")
         with col_down2:
-            st.download_button("📥 تحميل كملف نصي TXT", data=final_text, file_name="UniBrain_Text.txt")
+            export_button(final_text, "txt", "كملف نصي TXT", "UniBrain_Text.txt")
 
     with tab_ai:
         st.subheader("تلخيص المحتوى")
+        summary_text = selected_text(st.session_state.document, final_text, "summary_files")
+        summary_topic = st.text_input("🎯 التركيز على موضوع (اختياري):", key="summary_topic",
+                                      help="تلخيص الأجزاء الأقرب إلى الموضوع فقط بدل المستند كاملاً")
         if st.button("توليد تلخيص"):
-            if len(final_text.strip()) > 100:
-                with st.spinner("جاري التلخيص..."):
-                    # نلخص أول 1500 حرف لضمان السرعة
-                    summary = summarizer(final_text[:1500], max_length=150, min_length=40, do_sample=False)
-                    st.success("الخلاصة:")
-                    st.write(summary[0]['summary_text'])
+            if len(summary_text.strip()) > 100:
+                payload = {"text": summary_text, "topic": summary_topic.strip(),
+                           "incremental": get_incremental("summary")}
+                st.session_state.summary_job = get_job_manager().submit(
+                    "summarize", payload,
+                    key=content_hash(summary_text, "summarize", SUMMARY_TIME_BUDGET, summary_topic.strip()))
             else:
                 st.warning("النص قصير جداً للتلخيص.")
+        if st.session_state.get('summary_job'):
+            job = finished_job(st.session_state.summary_job)
+            if job is not None and job["status"] == FAILED:
+                st.error(f"فشل التلخيص: {job['error']}")
+            elif job is not None:
+                st.success("الخلاصة:")
+                st.write(job["result"]["text"])
+                show_rerun_count(job["result"], "تلخيص")
 
     with tab_trans:
         st.subheader("الترجمة")
+        translation_text = selected_text(st.session_state.document, final_text, "translation_files")
+        translation_topic = st.text_input("🎯 التركيز على موضوع (اختياري):", key="translation_topic",
+                                          help="ترجمة الأجزاء الأقرب إلى الموضوع فقط بدل المستند كاملاً")
         target_lang = st.selectbox("اختر اللغة:", ["العربية", "English"])
+        engine = st.radio("محرك الترجمة:", ["محلي (بدون إنترنت)", "Google"], horizontal=True)
         if st.button("بدء الترجمة"):
-            with st.spinner("جاري الترجمة..."):
-                lang_code = 'ar' if target_lang == "العربية" else 'en'
-                translated = translator.translate(final_text[:2000], dest=lang_code)
-                st.info(translated.text)
+            lang_code = 'ar' if target_lang == "العربية" else 'en'
+            backend = "marian" if engine.startswith("محلي") else "google"
+            try:
+                payload = {"text": translation_text, "topic": translation_topic.strip(), "dest": lang_code,
+                           "translator": get_translator(backend), "incremental": get_incremental("translation")}
+                st.session_state.translation_job = get_job_manager().submit(
+                    "translate", payload,
+                    key=content_hash(translation_text, "translate", backend, lang_code, translation_topic.strip()))
+            except Exception as e:
+                st.error(f"فشلت الترجمة: {e}")
+        if st.session_state.get('translation_job'):
+            job = finished_job(st.session_state.translation_job)
+            if job is not None and job["status"] == FAILED:
+                st.error(f"فشلت الترجمة: {job['error']}")
+            elif job is not None:
+                st.info(job["result"]["text"])
+                show_rerun_count(job["result"], "ترجمة")
+
+    with tab_search:
+        show_search()
 
 else:
     # شاشة الترحيب
     st.info("👈 ابدأ العمل برفع ملفاتك من القائمة الجانبية.")
     st.image("https://cdn-icons-png.flaticon.com/512/2991/2991148.png", width=100)
+    # البحث متاح بدون رفع: المحاضرات المستخرجة من قبل محفوظة في الفهرس
+    if get_search_index().files():
+        st.subheader("🔎 البحث في المحاضرات السابقة")
+        show_search()
+
+# بعد عرض الصفحة: تحميل النماذج في الخلفية إن طُلب ذلك عبر UNIBRAIN_WARMUP
+models.warm_up()
         if file_name.endswith(('png', 'jpg', 'jpeg')):
             img = Image.open(file)
             res = reader.readtext(np.array(img), detail=0)
@@ -0,0 +1,235 @@
+"""تجميع طلبات الجلسات المختلفة في دفعات واحدة أمام النماذج المشتركة (micro-batching).
+
+كل طلب يُسجل باسم جلسته. المجدول ينتظر بضع ميلي ثوان لتجميع الطلبات،
+ثم يأخذ من الجلسات بالتناوب (round-robin) حتى لا تحتكر جلسة واحدة الدفعة،
+ويشغّل النموذج مرة واحدة على الدفعة كاملة ويوزع النتائج.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+DEFAULT_MAX_BATCH = int(os.environ.get("UNIBRAIN_BATCH_MAX", "8"))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("UNIBRAIN_BATCH_WAIT_MS", "10"))
+# أقصى عدد عناصر لكل جلسة في الدفعة الواحدة (العدالة بين الجلسات)
+DEFAULT_MAX_PER_SESSION = int(os.environ.get("UNIBRAIN_BATCH_MAX_PER_SESSION", "4"))
+
+_session = contextvars.ContextVar("batch_session", default=None)
+
+
+@contextmanager
+def session(session_id):
+    """كل طلبات النماذج داخل هذا السياق تُنسب إلى session_id"""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def current_session():
+    return _session.get()
+
+
+class _Request:
+    __slots__ = ("items", "group", "future", "arrived")
+
+    def __init__(self, items, group):
+        self.items = items
+        self.group = group
+        self.future = Future()
+        self.arrived = time.monotonic()
+
+
+def gather(futures):
+    """Future واحد ينتهي بقائمة نتائج كل الـ futures مدموجة بالترتيب"""
+    out = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] or out.done():
+                return
+        try:
+            out.set_result([r for f in futures for r in f.result()])
+        except Exception as e:
+            out.set_exception(e)
+
+    if not futures:
+        out.set_result([])
+    for f in futures:
+        f.add_done_callback(done)
+    return out
+
+
+class MicroBatcher:
+    """مجدول دفعات أمام دالة fn(items, group) -> قائمة نتائج بنفس الطول.
+
+    group: الطلبات بنفس المجموعة فقط تجتمع في دفعة (مثلاً نفس معاملات التوليد).
+    max_request_items: الطلب الأكبر من ذلك يُقسم إلى طلبات أصغر تتناوب مع الجلسات الأخرى.
+    max_pending: حد عدد الطلبات المنتظرة لكل جلسة؛ submit ينتظر عند الامتلاء وtry_submit يعيد None.
+    الحد لكل جلسة وليس عاماً، فطلب كبير من جلسة لا يوقف طلبات الجلسات الأخرى.
+    """
+
+    def __init__(self, fn, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_per_session=DEFAULT_MAX_PER_SESSION, max_request_items=None, max_pending=None,
+                 name="batcher"):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_per_session = max_per_session
+        self.max_request_items = max_request_items
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._sessions = OrderedDict()
+        self._pending = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, items, group=None, session=None, block=True):
+        """إرسال قائمة عناصر؛ النتيجة Future بقائمة نتائج بنفس الترتيب"""
+        items = list(items)
+        session = current_session() if session is None else session
+        size = self.max_request_items
+        parts = [items[i:i + size] for i in range(0, len(items), size)] if size and items else [items]
+        futures = self._enqueue(parts, group, session, block)
+        if futures is None:
+            return None
+        return futures[0] if len(futures) == 1 else gather(futures)
+
+    def try_submit(self, items, group=None, session=None):
+        """مثل submit لكن تعيد None بدل الانتظار إذا كان المجدول ممتلئاً"""
+        return self.submit(items, group, session, block=False)
+
+    def submit_one(self, item, group=None, session=None, block=True):
+        """إرسال عنصر واحد؛ النتيجة Future بنتيجته مباشرة"""
+        fut = self.submit([item], group, session, block)
+        if fut is None:
+            return None
+        out = Future()
+
+        def done(f):
+            try:
+                out.set_result(f.result()[0])
+            except Exception as e:
+                out.set_exception(e)
+
+        fut.add_done_callback(done)
+        return out
+
+    def _enqueue(self, parts, group, session, block):
+        with self._cond:
+            # كل أجزاء الطلب تدخل معاً، فلا يبقى طلب نصف مُرسل عند الامتلاء؛
+            # الطلب الأكبر من الحد يدخل عندما لا يكون للجلسة طلبات منتظرة
+            while self.max_pending and self._session_pending(session) and \
+                    self._session_pending(session) + len(parts) > self.max_pending:
+                if not block:
+                    return None
+                self._cond.wait()
+            requests = [_Request(part, group) for part in parts]
+            self._sessions.setdefault(session, deque()).extend(requests)
+            self._pending += len(requests)
+            self._cond.notify_all()
+        return [r.future for r in requests]
+
+    def _session_pending(self, session):
+        return len(self._sessions.get(session, ()))
+
+    def _queued_items(self, group):
+        return sum(len(r.items) for q in self._sessions.values() for r in q if r.group == group)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # ننتظر بعد وصول أقدم طلب حتى تمتلئ الدفعة أو تنتهي المهلة
+            oldest = min((q[0] for q in self._sessions.values() if q), key=lambda r: r.arrived)
+            deadline = oldest.arrived + self.max_wait
+            while self._queued_items(oldest.group) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            group = oldest.group
+            batch, count = [], 0
+            taken = {s: 0 for s in self._sessions}
+            # حد الجلسة لا يُطبق إلا إذا كانت هناك جلسات أخرى تنتظر
+            contenders = sum(1 for q in self._sessions.values() if q and q[0].group == group)
+            limit = self.max_per_session if contenders > 1 else None
+            progress = True
+            # بالتناوب: طلب واحد من كل جلسة في كل دورة
+            while progress and count < self.max_batch:
+                progress = False
+                for sid, q in list(self._sessions.items()):
+                    if not q or q[0].group != group or (limit and taken[sid] >= limit):
+                        continue
+                    if batch and count + len(q[0].items) > self.max_batch:
+                        continue
+                    request = q.popleft()
+                    batch.append(request)
+                    count += len(request.items)
+                    taken[sid] += len(request.items)
+                    progress = True
+                    if count >= self.max_batch:
+                        break
+            # الجلسات التي أخذت دورها تنتقل إلى آخر الترتيب
+            for sid in [s for s in self._sessions if taken.get(s)]:
+                self._sessions.move_to_end(sid)
+            for sid in [s for s, q in self._sessions.items() if not q]:
+                del self._sessions[sid]
+            self._pending -= len(batch)
+            self._cond.notify_all()
+            return group, batch
+
+    def _execute(self, group, batch):
+        items = [item for request in batch for item in request.items]
+        results = self.fn(items, group)
+        pos = 0
+        for request in batch:
+            request.future.set_result(list(results[pos:pos + len(request.items)]))
+            pos += len(request.items)
+
+    def _run(self):
+        while True:
+            group, batch = self._next_batch()
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._execute(group, batch)
+            except Exception:
+                # طلب فاسد لا يجب أن يُفشل طلبات الجلسات الأخرى: نعيد كل طلب وحده
+                for request in batch:
+                    if request.future.done():
+                        continue
+                    try:
+                        self._execute(group, [request])
+                    except Exception as e:
+                        request.future.set_exception(e)
+
+
+class BatchedPipeline:
+    """غلاف حول pipeline مشترك: الاستدعاءات المتزامنة من جلسات مختلفة تُنفذ كدفعة واحدة"""
+
+    def __init__(self, pipe, **options):
+        self.pipe = pipe
+        self.tokenizer = pipe.tokenizer
+        self.model = pipe.model
+        self.model_id = getattr(pipe, "model_id", None)
+        options.setdefault("name", "pipeline-batcher")
+        self.batcher = MicroBatcher(self._run_batch, **options)
+
+    def _run_batch(self, items, group):
+        return self.pipe(items, batch_size=len(items), **dict(group))
+
+    def __call__(self, inputs, **kwargs):
+        kwargs.pop("batch_size", None)
+        single = isinstance(inputs, str)
+        group = tuple(sorted(kwargs.items()))
+        return self.batcher.submit([inputs] if single else inputs, group=group).result()
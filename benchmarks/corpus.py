@@ -0,0 +1,168 @@
+"""مجموعة مستندات اصطناعية ثابتة للقياس: نفس البذرة = نفس الملفات بالبايت.
+
+PDF نصي (كاتب PDF صغير بدون مكتبات إضافية)، PDF ممسوح (صور فقط)، DOCX بفقرات
+كثيرة، PPTX بشرائح وأشكال كثيرة، وصور نصوص عربية/إنجليزية.
+
+    python benchmarks/corpus.py out_dir --scale 2
+"""
+import argparse
+import datetime
+import io
+import os
+import random
+import zipfile
+
+import docx
+from PIL import Image, ImageDraw, ImageFont
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+WORDS = "lecture entropy energy system model data network function value theory".split()
+ARABIC_WORDS = "محاضرة طاقة نظام نموذج بيانات شبكة دالة قيمة نظرية تجربة".split()
+# تاريخ ثابت بدل وقت الإنشاء حتى لا تتغير البايتات بين تشغيلين
+FIXED_DATE = datetime.datetime(2020, 1, 1)
+
+
+def sentence(rng, words=WORDS, length=12):
+    return " ".join(rng.choice(words) for _ in range(length)).capitalize() + "."
+
+
+def _fixed_zip(data):
+    """إعادة كتابة ملف Office بتواريخ ثابتة لعناصر الـ zip"""
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as src, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            info = zipfile.ZipInfo(item.filename, FIXED_DATE.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            dst.writestr(info, src.read(item.filename))
+    return out.getvalue()
+
+
+def _fix_properties(props):
+    props.created = props.modified = props.last_printed = FIXED_DATE
+    props.revision = 1
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages, seed=0, lines_per_page=40):
+    """PDF نصي بخط Helvetica (نص لاتيني فقط، بدون تضمين خطوط)"""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [sentence(rng) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_text_image(seed=0, arabic=False, size=(1240, 1754), lines=30, font=None):
+    """صورة صفحة نصية؛ الحروف العربية تحتاج خطاً يدعمها (font: مسار ملف TTF)"""
+    rng = random.Random(seed)
+    face = ImageFont.truetype(font, 28) if font else ImageFont.load_default(size=28)
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    words = ARABIC_WORDS if arabic else WORDS
+    for i in range(lines):
+        draw.text((60, 60 + i * 52), sentence(rng, words, 8), fill="black", font=face)
+    return img
+
+
+def make_scanned_pdf(pages, seed=0, font=None):
+    """PDF من صور فقط (بدون طبقة نص) مثل المحاضرات الممسوحة ضوئياً"""
+    images = [make_text_image(seed + i, size=(1240, 1754), font=font).convert("L") for i in range(pages)]
+    bio = io.BytesIO()
+    images[0].save(bio, format="PDF", save_all=True, append_images=images[1:], resolution=150,
+                   creationDate=FIXED_DATE.timetuple(), modDate=FIXED_DATE.timetuple())
+    return bio.getvalue()
+
+
+def make_docx(paragraphs, seed=0):
+    rng = random.Random(seed)
+    doc = docx.Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            doc.add_heading(f"Section {i // 20 + 1}", level=1)
+        doc.add_paragraph(" ".join(sentence(rng) for _ in range(3)))
+    _fix_properties(doc.core_properties)
+    bio = io.BytesIO()
+    doc.save(bio)
+    return _fixed_zip(bio.getvalue())
+
+
+def make_pptx(slides, shapes_per_slide=6, seed=0):
+    rng = random.Random(seed)
+    prs = Presentation()
+    layout = prs.slide_layouts[5]
+    for i in range(slides):
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {i + 1}"
+        for j in range(shapes_per_slide):
+            box = slide.shapes.add_textbox(Inches(0.5 + (j % 2) * 4.5), Inches(1.5 + (j // 2) * 1.8),
+                                           Inches(4), Inches(1.5))
+            box.text_frame.text = sentence(rng)
+            box.text_frame.paragraphs[0].font.size = Pt(14)
+    _fix_properties(prs.core_properties)
+    bio = io.BytesIO()
+    prs.save(bio)
+    return _fixed_zip(bio.getvalue())
+
+
+def png_bytes(image):
+    bio = io.BytesIO()
+    image.save(bio, format="PNG")
+    return bio.getvalue()
+
+
+def build_corpus(scale=1, seed=0, font=None):
+    """قائمة (الاسم، البايتات)؛ scale يضاعف عدد الملفات وأحجامها"""
+    files = []
+    for i in range(2 * scale):
+        files.append((f"text_{i}.pdf", make_pdf(20 * scale, seed + i)))
+        files.append((f"notes_{i}.docx", make_docx(200 * scale, seed + i)))
+        files.append((f"slides_{i}.pptx", make_pptx(30 * scale, seed=seed + i)))
+    for i in range(scale):
+        files.append((f"scanned_{i}.pdf", make_scanned_pdf(2, seed + i, font)))
+        files.append((f"page_en_{i}.png", png_bytes(make_text_image(seed + i, font=font))))
+        files.append((f"page_ar_{i}.png", png_bytes(make_text_image(seed + i, arabic=True, font=font))))
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", help="خط TTF يدعم العربية لصور النصوص")
+    args = parser.parse_args()
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, data in build_corpus(args.scale, args.seed, args.font):
+        with open(os.path.join(args.out_dir, name), "wb") as fh:
+            fh.write(data)
+        print(f"{name:<20} {len(data) / 1024:9.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
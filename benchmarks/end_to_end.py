@@ -0,0 +1,144 @@
+"""قياس كل مرحلة من البداية للنهاية على مجموعة مستندات اصطناعية ثابتة (corpus.py).
+
+لكل مرحلة: زمن كل عنصر (p50/p90/p99)، الإنتاجية، وأعلى ذاكرة Python (tracemalloc).
+الذاكرة تُقاس في تشغيل منفصل حتى لا يؤثر tracemalloc على الأزمنة، ولا تشمل
+ذاكرة torch/onnxruntime الأصلية (انظر rss MB في آخر التقرير).
+
+    python benchmarks/end_to_end.py --stages extract_pdf extract_docx extract_pptx docx_export
+    python benchmarks/end_to_end.py --scale 2 --json e2e.json
+    python benchmarks/end_to_end.py --baseline e2e.json   # مقارنة مع قياس سابق
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+from export import create_docx_file  # noqa: E402
+from extraction import OCR_RESOLUTION, extract_pdf_pages, extract_text, pdf_page_count  # noqa: E402
+
+STAGES = ("extract_pdf", "extract_docx", "extract_pptx", "rasterize_scanned", "ocr", "summarize", "docx_export")
+
+
+def percentile(values, q):
+    """أقرب رتبة (nearest-rank)"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def build_stages(files, names):
+    """لكل مرحلة: (الدالة، قائمة المدخلات، حجم كل مدخل بالبايت)"""
+    by_ext = lambda prefix: [(n, d) for n, d in files if n.startswith(prefix)]  # noqa: E731
+    stages = {}
+    for stage, prefix in (("extract_pdf", "text_"), ("extract_docx", "notes_"), ("extract_pptx", "slides_")):
+        stages[stage] = (lambda item: extract_text(*item), by_ext(prefix), [len(d) for _, d in by_ext(prefix)])
+    scanned = by_ext("scanned_")
+    stages["rasterize_scanned"] = (lambda item: extract_pdf_pages(item[1], 0, pdf_page_count(item[1]),
+                                                                  OCR_RESOLUTION),
+                                   scanned, [len(d) for _, d in scanned])
+    texts = [extract_text(n, d) for n, d in files if n.startswith("notes_")]
+    stages["docx_export"] = (create_docx_file, texts, [len(t.encode("utf-8")) for t in texts])
+
+    if "ocr" in names:
+        import models
+        from ocr import BatchOcr
+        service = BatchOcr(models.load_reader())
+        images = [d for n, d in files if n.endswith(".png")]
+        images += [png for _, d in scanned for _, _, png in extract_pdf_pages(d, 0, pdf_page_count(d), OCR_RESOLUTION)]
+        stages["ocr"] = (lambda image: service.read([image]), images, [len(i) for i in images])
+    if "summarize" in names:
+        import models
+        from summarize import summarize_document
+        summarizer = models.load_summarizer()
+        stages["summarize"] = (lambda text: summarize_document(summarizer, text), texts,
+                               [len(t.encode("utf-8")) for t in texts])
+    return stages
+
+
+def run_stage(fn, items, sizes, repeat):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in items:
+        fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "items": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+        "items_per_s": len(latencies) / elapsed,
+        "mb_per_s": sum(sizes) * repeat / elapsed / 1e6,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stages", nargs="+", choices=STAGES,
+                        default=[s for s in STAGES if s not in ("ocr", "summarize")],
+                        help="ocr و summarize تحتاج easyocr / transformers")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--font", help="خط TTF يدعم العربية لصور النصوص")
+    parser.add_argument("--json", help="حفظ النتائج في ملف")
+    parser.add_argument("--baseline", help="ملف نتائج سابق للمقارنة")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="نسبة التراجع المسموحة")
+    args = parser.parse_args()
+
+    files = corpus.build_corpus(args.scale, args.seed, args.font)
+    stages = build_stages(files, args.stages)
+    results = {}
+    print(f"{'stage':<18} {'n':>4} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8} {'items/s':>8} {'MB/s':>7} {'peak MB':>8}")
+    for name in args.stages:
+        fn, items, sizes = stages[name]
+        if not items:
+            continue
+        # تشغيل أولي (تحميل مكتبات / تسخين)
+        fn(items[0])
+        r = results[name] = run_stage(fn, items, sizes, args.repeat)
+        print(f"{name:<18} {r['items']:>4} {r['p50']:>8.3f} {r['p90']:>8.3f} {r['p99']:>8.3f} "
+              f"{r['items_per_s']:>8.2f} {r['mb_per_s']:>7.2f} {r['peak_mb']:>8.1f}")
+    print(f"rss MB: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"scale": args.scale, "seed": args.seed, "stages": results}, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if (baseline.get("scale"), baseline.get("seed")) != (args.scale, args.seed):
+            print("warning: baseline was measured on a different corpus (scale/seed)")
+        regressions = []
+        for name, r in results.items():
+            old = baseline["stages"].get(name)
+            if old is None:
+                continue
+            for metric in ("p50", "p90", "peak_mb"):
+                if r[metric] > old[metric] * (1 + args.tolerance):
+                    regressions.append(f"{name} {metric} {old[metric]:.3f} -> {r[metric]:.3f}")
+        for line in regressions:
+            print(f"regression: {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
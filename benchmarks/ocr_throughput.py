@@ -0,0 +1,103 @@
+"""قياس سرعة OCR (صورة/ثانية) لأحجام دفعات مختلفة على المعالج.
+
+    python benchmarks/ocr_throughput.py --images 32 --batch-sizes 1 2 4 8 16
+    python benchmarks/ocr_throughput.py --adaptive   # مقارنة القارئ الواحد مع الاختيار حسب الخط
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import LazyModel, ReaderPool  # noqa: E402
+from ocr import BatchOcr  # noqa: E402
+
+WORDS = "lecture entropy energy system model data network function value theory".split()
+
+
+def make_images(count, seed=0):
+    """صور نصية اصطناعية ثابتة (نفس البذرة = نفس الصور) بأحجام متقاربة"""
+    rng = random.Random(seed)
+    font = ImageFont.load_default()
+    images = []
+    for _ in range(count):
+        width, height = rng.choice([(800, 600), (820, 610), (1024, 768)])
+        img = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(img)
+        for line in range(12):
+            words = " ".join(rng.choice(WORDS) for _ in range(6))
+            draw.text((20, 20 + line * 40), words, fill="black", font=font)
+        images.append(img)
+    return images
+
+
+def make_mixed_images(count, seed=0):
+    """مزيج أقرب إلى المحاضرات: صفحات نصية، وصفحات فارغة، وصفحات رسوم بلا نص"""
+    rng = random.Random(seed)
+    images = make_images(count, seed)
+    for i in range(0, count, 4):
+        images[i] = Image.new("RGB", images[i].size, "white")
+    for i in range(1, count, 4):
+        img = Image.new("RGB", images[i].size, "white")
+        draw = ImageDraw.Draw(img)
+        for _ in range(6):
+            x, y = rng.randrange(50, 600), rng.randrange(50, 400)
+            draw.ellipse((x, y, x + 150, y + 120), outline="black", width=4)
+        images[i] = img
+    return images
+
+
+def best_time(service, images, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        service.read(images)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare_adaptive(reader, args):
+    """نفس الصور بالقارئ الكامل فقط ثم مع ReaderPool (models.ADAPTIVE_OCR)"""
+    pool = ReaderPool(LazyModel("ocr", lambda: reader))
+    for name, images in (("text", make_images(args.images)), ("mixed", make_mixed_images(args.images))):
+        # التشغيل الأول يحمّل القارئ الإنجليزي حتى لا يدخل زمن تحميله في القياس
+        BatchOcr(reader, readers=pool).read(images[:4])
+        print(f"{name} pages ({len(images)} images)")
+        print(f"{'mode':>9} {'seconds':>9} {'img/s':>8}")
+        for mode, readers in (("single", None), ("adaptive", pool)):
+            best = best_time(BatchOcr(reader, batch_size=args.batch_sizes[0], readers=readers), images, args.repeat)
+            print(f"{mode:>9} {best:>9.2f} {len(images) / best:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--langs", nargs="+", default=["ar", "en"])
+    parser.add_argument("--adaptive", action="store_true",
+                        help="مقارنة القارئ الواحد مع اختيار القارئ حسب الخط (بأول حجم دفعة)")
+    args = parser.parse_args()
+
+    import easyocr
+    reader = easyocr.Reader(args.langs, gpu=False)
+    if args.adaptive:
+        compare_adaptive(reader, args)
+        return
+    images = make_images(args.images)
+    # تشغيل أولي لتحميل الأوزان وتسخين المعالج
+    BatchOcr(reader, batch_size=1).read(images[:1])
+
+    print(f"{'batch':>6} {'seconds':>9} {'img/s':>8}")
+    for batch_size in args.batch_sizes:
+        best = best_time(BatchOcr(reader, batch_size=batch_size), images, args.repeat)
+        print(f"{batch_size:>6} {best:>9.2f} {len(images) / best:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
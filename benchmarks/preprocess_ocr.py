@@ -0,0 +1,98 @@
+"""مقارنة OCR على الصورة الخام مقابل الصورة بعد التجهيز (الزمن والدقة).
+
+    python benchmarks/preprocess_ocr.py --images 8
+    python benchmarks/preprocess_ocr.py --skip-ocr     # زمن التجهيز فقط
+"""
+import argparse
+import difflib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocess import PreprocessConfig, preprocess_image  # noqa: E402
+
+WORDS = "lecture entropy energy system model data network function value theory".split()
+EXIF_ORIENTATION = 0x0112
+
+
+def make_photo(rng, size=(4000, 3000)):
+    """صورة تشبه صورة هاتف: دقة عالية، هوامش كبيرة، ميلان بسيط وتدوير EXIF"""
+    font = ImageFont.load_default(size=64)
+    lines = [" ".join(rng.choice(WORDS) for _ in range(5)) for _ in range(8)]
+    img = Image.new("RGBA", size, (250, 250, 245, 255))
+    draw = ImageDraw.Draw(img)
+    x, y = rng.randint(300, 900), rng.randint(300, 700)
+    for i, line in enumerate(lines):
+        draw.text((x, y + i * 120), line, fill=(20, 20, 20, 255), font=font)
+    img = img.rotate(rng.uniform(-4, 4), expand=False, fillcolor=(250, 250, 245, 255))
+    # نخزن الصورة مدورة مع وسم EXIF يعيدها لوضعها الصحيح (كما تفعل كاميرات الهواتف)
+    rotated = img.convert("RGB").transpose(Image.ROTATE_90)
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 8
+    bio = io.BytesIO()
+    rotated.save(bio, format="JPEG", quality=90, exif=exif)
+    return bio.getvalue(), " ".join(lines)
+
+
+def similarity(expected, actual):
+    norm = lambda s: " ".join(s.lower().split())  # noqa: E731
+    return difflib.SequenceMatcher(None, norm(expected), norm(actual)).ratio()
+
+
+def summarize(name, latencies, scores=None):
+    line = f"{name:<12} mean {statistics.mean(latencies):7.3f}s  p50 {statistics.median(latencies):7.3f}s"
+    if scores:
+        line += f"  accuracy {statistics.mean(scores):.3f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--skip-ocr", action="store_true")
+    parser.add_argument("--target-text-height", type=int, default=PreprocessConfig.target_text_height)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    photos = [make_photo(rng) for _ in range(args.images)]
+    config = PreprocessConfig(target_text_height=args.target_text_height)
+
+    prep_times, prepared = [], []
+    for data, _ in photos:
+        start = time.perf_counter()
+        prepared.append(np.asarray(preprocess_image(Image.open(io.BytesIO(data)), config)))
+        prep_times.append(time.perf_counter() - start)
+    summarize("preprocess", prep_times)
+    raw_px = statistics.mean(Image.open(io.BytesIO(d)).size[0] * Image.open(io.BytesIO(d)).size[1] for d, _ in photos)
+    prep_px = statistics.mean(a.shape[0] * a.shape[1] for a in prepared)
+    print(f"pixels: raw {raw_px / 1e6:.1f} MP -> preprocessed {prep_px / 1e6:.2f} MP")
+    if args.skip_ocr:
+        return
+
+    import easyocr
+    reader = easyocr.Reader(["ar", "en"], gpu=False)
+    raw_times, raw_scores, new_times, new_scores = [], [], [], []
+    for (data, truth), prep_time, array in zip(photos, prep_times, prepared):
+        start = time.perf_counter()
+        text = " ".join(reader.readtext(np.array(Image.open(io.BytesIO(data))), detail=0))
+        raw_times.append(time.perf_counter() - start)
+        raw_scores.append(similarity(truth, text))
+
+        start = time.perf_counter()
+        text = " ".join(reader.readtext(array, detail=0))
+        new_times.append(time.perf_counter() - start + prep_time)
+        new_scores.append(similarity(truth, text))
+    summarize("raw", raw_times, raw_scores)
+    summarize("preprocessed", new_times, new_scores)
+
+
+if __name__ == "__main__":
+    main()
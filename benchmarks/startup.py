@@ -0,0 +1,104 @@
+"""قياس زمن الإقلاع البارد: استيراد وحدات التطبيق ثم تحميل كل نموذج على حدة.
+
+كل قياس يعمل في عملية Python جديدة حتى لا تؤثر الوحدات المحملة مسبقاً على النتيجة.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --models ocr summarizer --json startup.json
+    python benchmarks/startup.py --baseline startup.json   # مقارنة مع قياس سابق
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def app_imports(path=os.path.join(ROOT, "app.py")):
+    """سطر import لكل الوحدات التي يستوردها app.py عند الإقلاع (بدون النماذج).
+
+    القائمة تُقرأ من كتلة الاستيراد في أول الملف بـ ast، فلا تتأخر عن التطبيق
+    عندما تُضاف وحدة أو تُحذف.
+    """
+    with open(path, encoding="utf-8") as fh:
+        lines = []
+        for line in fh:
+            stripped = line.strip()
+            if stripped and not stripped.startswith(("#", "import ", "from ")):
+                break
+            lines.append(line)
+    modules = []
+    for node in ast.parse("".join(lines)).body:
+        names = [a.name for a in node.names] if isinstance(node, ast.Import) else [node.module]
+        for name in names:
+            top = name.split(".")[0]
+            if top not in modules:
+                modules.append(top)
+    return "import " + ", ".join(modules)
+
+IMPORT_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in ("torch", "transformers", "easyocr") if m in sys.modules)
+print(json.dumps({{"seconds": elapsed, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "heavy_modules": heavy}}))
+"""
+
+MODEL_PROBE = """
+import json, resource, time
+import models
+start = time.perf_counter()
+models.MODELS[{name!r}].get()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def probe(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", nargs="*", default=["ocr", "summarizer"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="حفظ النتائج في ملف")
+    parser.add_argument("--baseline", help="ملف نتائج سابق للمقارنة")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="نسبة التراجع المسموحة")
+    args = parser.parse_args()
+
+    results = {}
+    runs = [probe(IMPORT_PROBE.format(imports=app_imports())) for _ in range(args.repeat)]
+    results["app_imports"] = min(runs, key=lambda r: r["seconds"])
+    if results["app_imports"]["heavy_modules"]:
+        print("warning: heavy modules imported at startup:", ", ".join(results["app_imports"]["heavy_modules"]))
+    for name in args.models:
+        results[f"load_{name}"] = probe(MODEL_PROBE.format(name=name))
+
+    print(f"{'stage':<20} {'seconds':>9} {'rss MB':>9}")
+    for stage, r in results.items():
+        print(f"{stage:<20} {r['seconds']:>9.3f} {r['rss_mb']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = [
+            stage for stage, r in results.items()
+            if stage in baseline and r["seconds"] > baseline[stage]["seconds"] * (1 + args.tolerance)
+        ]
+        for stage in regressions:
+            print(f"regression: {stage} {baseline[stage]['seconds']:.3f}s -> {results[stage]['seconds']:.3f}s")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""مقارنة أنماط استدلال الملخص: الزمن، توكن/ثانية، أقصى ذاكرة، وفرق ROUGE عن fp32.
+
+كل نمط يعمل في عملية منفصلة حتى تكون قراءة الذاكرة (peak RSS) نظيفة.
+
+    python benchmarks/summarizer_modes.py --modes fp32 int8 onnx --threads 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DOCUMENTS = [
+    "Entropy is a measure of the number of microscopic configurations that correspond to a "
+    "macroscopic state. In the lecture the professor introduced entropy through the example of a gas "
+    "expanding into a vacuum. The second law of thermodynamics states that the total entropy of an "
+    "isolated system never decreases over time. This explains why heat flows from hot bodies to cold "
+    "ones and why many processes are irreversible. Later we connected entropy to information theory, "
+    "where Shannon defined it as the expected amount of information in a message. A fair coin has one "
+    "bit of entropy, while a biased coin has less because its outcome is more predictable.",
+    "A neural network is composed of layers of simple units that compute weighted sums of their inputs "
+    "followed by a non-linear activation. Training adjusts the weights using gradient descent on a loss "
+    "function, and backpropagation computes the gradients efficiently by applying the chain rule layer "
+    "by layer. Overfitting happens when the network memorizes the training data instead of learning "
+    "general patterns. Regularization techniques such as dropout, weight decay and early stopping help "
+    "the model generalize. The lecture ended with a discussion of convolutional networks for images.",
+    "Supply and demand determine prices in a competitive market. When demand rises while supply stays "
+    "constant, prices increase until a new equilibrium is reached. Price elasticity measures how "
+    "strongly the quantity demanded reacts to a change in price. Goods with close substitutes tend to "
+    "be elastic, while necessities are usually inelastic. Governments sometimes intervene with price "
+    "ceilings or floors, which can create shortages or surpluses. The assignment asks students to "
+    "analyse the effect of a tax on a good with inelastic demand.",
+]
+
+RUN_MODE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from models import load_summarizer
+load_start = time.perf_counter()
+summarizer = load_summarizer({mode!r}, {threads!r})
+load_seconds = time.perf_counter() - load_start
+docs = json.loads({docs!r})
+summarizer(docs[0], max_length=60, min_length=20, do_sample=False)
+latencies, tokens, outputs = [], 0, []
+for _ in range({repeat}):
+    for doc in docs:
+        start = time.perf_counter()
+        out = summarizer(doc, max_length=120, min_length=40, do_sample=False)[0]["summary_text"]
+        latencies.append(time.perf_counter() - start)
+        tokens += len(summarizer.tokenizer(out)["input_ids"])
+        outputs.append(out)
+print(json.dumps({{"load_seconds": load_seconds, "latencies": latencies, "tokens": tokens,
+                  "outputs": outputs[:len(docs)],
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def _lcs(a, b):
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def rouge_l(reference, candidate):
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref or not cand:
+        return 0.0
+    lcs = _lcs(ref, cand)
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_mode(mode, threads, repeat):
+    code = RUN_MODE.format(root=ROOT, mode=mode, threads=threads, repeat=repeat, docs=json.dumps(DOCUMENTS))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", default=["fp32", "int8", "onnx"])
+    parser.add_argument("--threads", type=int, default=0, help="0 = إعداد torch الافتراضي")
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    modes = args.modes if "fp32" in args.modes else ["fp32"] + args.modes
+    results = {mode: run_mode(mode, args.threads, args.repeat) for mode in modes}
+    reference = results["fp32"].get("outputs")
+
+    print(f"{'mode':<6} {'load s':>7} {'p50 s':>7} {'p90 s':>7} {'tok/s':>7} {'RSS MB':>8} {'ROUGE-L Δ':>10}")
+    for mode, r in results.items():
+        if "error" in r:
+            print(f"{mode:<6} error: {r['error']}")
+            continue
+        lat = sorted(r["latencies"])
+        p90 = lat[min(len(lat) - 1, int(len(lat) * 0.9))]
+        tok_s = r["tokens"] / sum(lat)
+        delta = ""
+        if reference:
+            score = statistics.mean(rouge_l(a, b) for a, b in zip(reference, r["outputs"]))
+            delta = f"{score - 1.0:+.3f}"
+        print(f"{mode:<6} {r['load_seconds']:>7.2f} {statistics.median(lat):>7.2f} {p90:>7.2f} "
+              f"{tok_s:>7.1f} {r['peak_rss_mb']:>8.0f} {delta:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""ذاكرة تخزين مؤقت من طبقتين: ذاكرة LRU داخل العملية + ملفات على القرص."""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "UNIBRAIN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "unibrain")
+)
+
+
+# عدد الأحرف المرمّزة في كل خطوة عند حساب بصمة نص
+_HASH_SLICE = 1 << 20
+
+
+def content_hash(data, *parts):
+    """بصمة SHA-256 للمحتوى مع أي أجزاء إضافية (نسخة المستخرج، نوع الملف...)"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        h.update(data)
+    else:
+        # النصوص الكبيرة تُرمّز على شرائح بدل نسخة UTF-8 كاملة في الذاكرة (نفس البصمة)
+        data = str(data)
+        for start in range(0, len(data), _HASH_SLICE):
+            h.update(data[start:start + _HASH_SLICE].encode("utf-8"))
+    return h.hexdigest()
+
+
+def _size_of(value):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class LRUCache:
+    """طبقة الذاكرة: تطرد الأقدم استخداماً عند تجاوز الحجم الكلي"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def set(self, key, value):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.total_bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, old_size) = self._items.popitem(last=False)
+                self.total_bytes -= old_size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DiskCache:
+    """طبقة القرص: ملف لكل مفتاح، والطرد حسب آخر استخدام عند تجاوز الحجم"""
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # تقدير للحجم الكلي حتى لا نمسح المجلد بعد كل كتابة
+        self._approx_bytes = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pkl")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        # تحديث وقت الاستخدام ليعتمد عليه الطرد
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # كتابة ذرية: ملف مؤقت ثم استبدال، حتى لا تقرأ جلسة أخرى ملفاً ناقصاً
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += os.path.getsize(path)
+            needs_scan = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if needs_scan:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".pkl"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                    except OSError:
+                        pass
+            self._approx_bytes = total
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+
+class TieredCache:
+    """البحث في الذاكرة أولاً ثم القرص، مع رفع ما يوجد على القرص إلى الذاكرة"""
+
+    def __init__(self, directory, memory_bytes=64 * 1024 * 1024, disk_bytes=1024 * 1024 * 1024):
+        self.memory = LRUCache(memory_bytes)
+        self.disk = DiskCache(directory, disk_bytes)
+
+    def get(self, key, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = self.disk.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def __contains__(self, key):
+        return key in self.memory or key in self.disk
+
+
+_MISSING = object()
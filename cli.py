@@ -0,0 +1,112 @@
+"""معالجة مجلد أو قائمة ملفات من سطر الأوامر بدون Streamlit (مناسب لـ cron).
+
+كل ملف يُكتب كسطر JSON في ملف المخرجات فور انتهائه، فإذا توقف التشغيل
+يكمل التشغيل التالي من حيث توقف (الملفات التي تغير محتواها تعالج من جديد).
+
+    python cli.py lectures/ -o out.jsonl --workers 8
+    python cli.py manifest.txt -o out.jsonl --summarize --translate en --docx-dir docx/
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import tracing
+from export import write_docx as write_docx_file
+from pipeline import Pipeline, find_files
+from search_index import DEFAULT_INDEX_PATH, SearchIndex
+
+
+def read_manifest(path):
+    """ملف نصي بمسار في كل سطر (المسارات النسبية بالنسبة لمكان الملف)"""
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+
+def load_checkpoint(path):
+    """(المسار، البصمة) للملفات التي عولجت بنجاح في تشغيل سابق"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # سطر ناقص من تشغيل توقف أثناء الكتابة
+                continue
+            if record.get("error") is None:
+                done.add((record["path"], record["sha256"]))
+    return done
+
+
+def write_docx(directory, root, result):
+    name = os.path.relpath(result["path"], root) if root else os.path.basename(result["path"])
+    target = os.path.join(directory, os.path.splitext(name)[0] + ".docx")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    sections = [(title, result[field]) for title, field in (("الملخص", "summary"), ("الترجمة", "translation"))
+                if result[field]]
+    with open(target, "wb") as f:
+        write_docx_file(f, result["text"], sections)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="مجلد (يُبحث فيه بشكل متداخل) أو ملف نصي بقائمة مسارات")
+    parser.add_argument("-o", "--output", default="unibrain.jsonl", help="ملف المخرجات JSONL (ونقطة الاستكمال)")
+    parser.add_argument("--workers", type=int, default=None, help="عدد العمال (الافتراضي: عدد الأنوية)")
+    parser.add_argument("--summarize", action="store_true", help="تلخيص كل ملف")
+    parser.add_argument("--translate", choices=("ar", "en"), help="ترجمة كل ملف إلى هذه اللغة")
+    parser.add_argument("--backend", default="marian", choices=("marian", "google"))
+    parser.add_argument("--topic", help="تلخيص/ترجمة الأجزاء الأقرب إلى هذا الموضوع فقط")
+    parser.add_argument("--time-budget", type=float, default=None, help="حد زمني لتلخيص الملف الواحد بالثواني")
+    parser.add_argument("--docx-dir", help="كتابة ملف Word لكل ملف في هذا المجلد")
+    parser.add_argument("--index", nargs="?", const=DEFAULT_INDEX_PATH,
+                        help="إضافة الصفحات إلى فهرس البحث (الافتراضي: فهرس التطبيق)")
+    parser.add_argument("--no-resume", action="store_true", help="تجاهل المخرجات السابقة والبدء من جديد")
+    args = parser.parse_args(argv)
+
+    root = args.input if os.path.isdir(args.input) else None
+    paths = find_files(root) if root else read_manifest(args.input)
+    done = set() if args.no_resume else load_checkpoint(args.output)
+    if args.no_resume and os.path.exists(args.output):
+        os.remove(args.output)
+
+    start = time.perf_counter()
+    processed = failed = skipped = 0
+
+    def skip(path, sha):
+        nonlocal skipped
+        if (path, sha) in done:
+            skipped += 1
+            return True
+        return False
+
+    with Pipeline(workers=args.workers, summarize=args.summarize, translate_to=args.translate,
+                  backend=args.backend, time_budget=args.time_budget,
+                  index=SearchIndex(args.index) if args.index else None, topic=args.topic) as pipe, \
+            open(args.output, "a", encoding="utf-8") as out:
+        for result in pipe.process(paths, skip=skip):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            processed += 1
+            if result["error"]:
+                failed += 1
+            elif args.docx_dir:
+                write_docx(args.docx_dir, root, result)
+            print(f"[{processed + skipped}/{len(paths)}] {result['path']} "
+                  f"{result['error'] or 'ok'} ({result['seconds']}s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    if tracing.METRICS_FILE:
+        tracing.TRACER.write_textfile(tracing.METRICS_FILE)
+    print(f"processed {processed} files ({failed} failed, {skipped} skipped) in {elapsed:.1f}s"
+          f" - {processed / elapsed if elapsed else 0:.2f} files/s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
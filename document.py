@@ -0,0 +1,73 @@
+"""نموذج مستند مضغوط: نص واحد مشترك + مقاطع (spans) تشير إلى أجزائه.
+
+النص هو نفسه العرض المسطح الذي يراه المستخدم (عنوان لكل ملف ثم صفحاته)،
+والمقاطع إزاحات داخله: مقطع لكل ملف ومقطع لكل صفحة/شريحة/فقرة/صورة، مع
+بيانات إضافية (اسم الملف، الخطأ، هل النص من OCR...). التلخيص والترجمة والبحث
+والتصدير تأخذ ما تحتاجه من المقاطع بدون نسخ النص كله أو إعادة تحليله.
+"""
+from collections import namedtuple
+
+from extraction import file_kind
+
+# kind: file أو نوع الجزء (page / slide / paragraph / image)
+# start/end: إزاحات في Document.text، file: رقم الملف، unit: رقم الصفحة/الشريحة، meta: قاموس أو None
+Span = namedtuple("Span", "kind start end file unit meta")
+
+UNIT_KINDS = {"pdf": "page", "pptx": "slide", "docx": "paragraph", "image": "image"}
+
+
+def file_header(name):
+    return f"\n\n--- ملف: {name} ---\n"
+
+
+class Document:
+    """النص المسطح + مقاطع مرتبة حسب الإزاحة"""
+
+    def __init__(self, text="", spans=()):
+        self.text = text
+        self.spans = list(spans)
+        self._units = [s for s in self.spans if s.kind != "file"]
+
+    @classmethod
+    def from_files(cls, names, files, metas=None):
+        """names: أسماء الملفات، files: لكل ملف قائمة (رقم، نص[، meta]) أو None لتجاهله.
+
+        النص الناتج مطابق لـ combine_texts القديمة: عنوان الملف ثم كل جزء في سطر.
+        """
+        parts, spans, pos = [], [], 0
+        for f, (name, units) in enumerate(zip(names, files)):
+            if units is None:
+                continue
+            header = file_header(name)
+            parts.append(header)
+            pos += len(header)
+            file_span = len(spans)
+            start = pos
+            kind = UNIT_KINDS.get(file_kind(name), "block")
+            for unit in sorted(units, key=lambda u: u[0]):
+                text = unit[1]
+                spans.append(Span(kind, pos, pos + len(text), f, unit[0], unit[2] if len(unit) > 2 else None))
+                parts.append(text)
+                parts.append("\n")
+                pos += len(text) + 1
+            meta = {"name": name}
+            if metas and metas[f]:
+                meta.update(metas[f])
+            spans.insert(file_span, Span("file", start, pos, f, None, meta))
+        return cls("".join(parts), spans)
+
+    def files(self):
+        return [s for s in self.spans if s.kind == "file"]
+
+    def units(self, file=None):
+        return [s for s in self._units if file is None or s.file == file]
+
+    def slice(self, span):
+        return self.text[span.start:span.end]
+
+    def render(self, files=None):
+        """العرض المسطح لكل الملفات أو لملفات مختارة (بعناوينها)"""
+        if files is None:
+            return self.text
+        return "".join(file_header(s.meta["name"]) + self.text[s.start:s.end]
+                       for s in self.files() if s.file in files)
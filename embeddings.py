@@ -0,0 +1,190 @@
+"""بحث دلالي: تضمين الأجزاء (embeddings) واختيار الأقرب إلى موضوع يحدده المستخدم.
+
+المتجهات تُحفظ في ملف NumPy memmap على القرص (صف لكل جزء، معرّف ببصمة نصه)،
+فالجزء الذي رُمّز مرة لا يُرمّز ثانية، والبحث جداء نقطي واحد على مصفوفة
+متجهات مُطبّعة (cosine). وضع "التركيز على موضوع" يمرر للتلخيص والترجمة
+أقرب k أجزاء فقط بدل المستند كاملاً.
+"""
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+import tracing
+from cache import DEFAULT_CACHE_DIR, content_hash
+from summarize import chunk_text
+
+DEFAULT_STORE_DIR = os.path.join(DEFAULT_CACHE_DIR, "embeddings")
+
+# أجزاء أصغر من أجزاء التلخيص حتى يكون الاختيار دقيقاً
+FOCUS_CHUNK_TOKENS = 200
+DEFAULT_TOP_K = 8
+DEFAULT_BATCH_SIZE = 32
+# عند تجاوز هذا العدد من المتجهات يُفرّغ المخزن ويبدأ من جديد
+MAX_ROWS = 500_000
+
+
+class Embedder:
+    """تضمين الجمل بمتوسط مخرجات المحوّل (mean pooling) ثم تطبيع L2"""
+
+    def __init__(self, tokenizer, model, model_id, max_length=256):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.model_id = model_id
+        self.max_length = max_length
+        self.dim = model.config.hidden_size
+
+    def encode(self, texts, batch_size=DEFAULT_BATCH_SIZE):
+        """مصفوفة (عدد النصوص، dim) float32؛ الدفعات مرتبة حسب الطول لتقليل الحشو"""
+        import torch
+        with tracing.span("embed", texts=len(texts), characters=sum(map(len, texts))):
+            return self._encode(torch, texts, batch_size)
+
+    def _encode(self, torch, texts, batch_size):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            inputs = self.tokenizer([texts[i] for i in batch], return_tensors="pt", padding=True,
+                                    truncation=True, max_length=self.max_length)
+            with torch.inference_mode():
+                hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, dim=1)
+            out[batch] = pooled.numpy()
+        return out
+
+
+class VectorStore:
+    """متجهات على القرص (memmap) + جدول SQLite يربط بصمة النص برقم الصف.
+
+    المخزن مشترك بين العمليات (التطبيق و cli.py وعمال Streamlit)، فرقم الصف
+    التالي لا يُحفظ في الذاكرة: يُحسب من الجدول داخل معاملة BEGIN IMMEDIATE
+    تبقى مفتوحة حتى تُكتب المتجهات، فلا يكتب كاتبان في نفس الصفوف. القراءة
+    أيضاً داخل معاملة، ومع journal_mode الافتراضي (وليس WAL) لا يكتمل تفريغ
+    المخزن عند MAX_ROWS قبل أن ينتهي القراء من الصفوف القديمة.
+    """
+
+    def __init__(self, directory, dim):
+        self.dim = dim
+        self.path = os.path.join(directory, f"vectors-{dim}.f32")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # isolation_level=None: المعاملات تُفتح وتُغلق صراحة في _rows و _append
+        self._db = sqlite3.connect(os.path.join(directory, f"rows-{dim}.sqlite3"), timeout=30,
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.vectors = None
+        self._open(max(1024, self._next_row()))
+
+    def _open(self, capacity):
+        """فتح (وتكبير إن لزم) ملف الـ memmap ليتسع لـ capacity صف"""
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        size = capacity * self.dim * 4
+        with open(self.path, "ab") as fh:
+            if fh.tell() < size:
+                fh.truncate(size)
+        capacity = os.path.getsize(self.path) // (self.dim * 4)
+        self.vectors = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _next_row(self):
+        return self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+
+    def _lookup(self, keys):
+        rows = {}
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            marks = ",".join("?" * len(part))
+            rows.update(self._db.execute(f"SELECT key, row FROM rows WHERE key IN ({marks})", part))
+        return rows
+
+    def _rows(self, keys, result):
+        """يملأ result بالمتجهات الموجودة ويعيد {البصمة: الصف} لها"""
+        self._db.execute("BEGIN")
+        try:
+            rows = self._lookup(keys)
+            found = [i for i, k in enumerate(keys) if k in rows]
+            if found:
+                needed = max(rows[keys[i]] for i in found) + 1
+                if needed > len(self.vectors):
+                    # عملية أخرى كبّرت الملف بعد فتحه هنا
+                    self._open(needed)
+                result[found] = self.vectors[[rows[keys[i]] for i in found]]
+        finally:
+            self._db.execute("COMMIT")
+        return rows
+
+    def _append(self, keys, encoded):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            start = self._next_row()
+            if start + len(keys) > MAX_ROWS:
+                self._db.execute("DELETE FROM rows")
+                # COMMIT ينتظر القراء الحاليين، وبعده لا تشير أي بصمة إلى الصفوف القديمة
+                self._db.execute("COMMIT")
+                self._db.execute("BEGIN IMMEDIATE")
+                start = self._next_row()
+            if start + len(keys) > len(self.vectors):
+                self._open(max(2 * len(self.vectors), start + len(keys)))
+            self.vectors[start:start + len(keys)] = encoded
+            self.vectors.flush()
+            self._db.executemany("INSERT OR REPLACE INTO rows (key, row) VALUES (?, ?)",
+                                 [(k, start + j) for j, k in enumerate(keys)])
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def embed(self, texts, embedder):
+        """متجهات النصوص بالترتيب؛ يُرمّز فقط ما لم يُرمّز من قبل"""
+        keys = [content_hash(t, embedder.model_id) for t in texts]
+        result = np.empty((len(keys), self.dim), dtype=np.float32)
+        with self._lock:
+            rows = self._rows(keys, result)
+        missing = {}
+        for i, k in enumerate(keys):
+            if k not in rows:
+                missing.setdefault(k, []).append(i)
+        if missing:
+            encoded = embedder.encode([texts[indexes[0]] for indexes in missing.values()])
+            for vector, indexes in zip(encoded, missing.values()):
+                result[indexes] = vector
+            with self._lock:
+                self._append(list(missing), encoded)
+        return result
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(dim, directory=DEFAULT_STORE_DIR):
+    """مخزن واحد لكل (مجلد، بُعد) داخل العملية، مشترك بين الخيوط"""
+    with _stores_lock:
+        if (directory, dim) not in _stores:
+            _stores[(directory, dim)] = VectorStore(directory, dim)
+        return _stores[(directory, dim)]
+
+
+def top_k(query, vectors, k=DEFAULT_TOP_K):
+    """أرقام أقرب k متجهات (cosine: المتجهات مُطبّعة) مرتبة من الأقرب"""
+    if not len(vectors):
+        return []
+    scores = vectors @ query
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])].tolist()
+
+
+def focus_text(text, topic, embedder, store, k=DEFAULT_TOP_K, chunk_tokens=FOCUS_CHUNK_TOKENS):
+    """أقرب k أجزاء من النص إلى الموضوع، بترتيبها الأصلي في المستند"""
+    chunks = chunk_text(text, embedder.tokenizer, chunk_tokens)
+    if len(chunks) <= k:
+        return text
+    vectors = store.embed(chunks, embedder)
+    best = top_k(embedder.encode([topic])[0], vectors, k)
+    return "\n\n".join(chunks[i] for i in sorted(best))
@@ -0,0 +1,184 @@
+"""تصدير النصوص إلى ملفات Word و TXT (بدون Streamlit).
+
+ملف Word يُكتب بشكل متدفق: XML المستند يُكتب مباشرة داخل ملف الـ zip فقرة
+بفقرة، فلا يُبنى المستند كاملاً في الذاكرة كما في python-docx. الملفات الجاهزة
+تُحفظ على القرص باسم بصمة المحتوى، فالنص نفسه لا يُصدّر مرتين.
+"""
+import io
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+import tracing
+from cache import DEFAULT_CACHE_DIR, content_hash
+from textscript import ARABIC
+
+EXPORT_DIR = os.path.join(DEFAULT_CACHE_DIR, "exports")
+# حد حجم مجلد التصدير؛ الأقدم استخداماً يُحذف أولاً
+EXPORT_MAX_BYTES = 256 * 1024 * 1024
+# غيّر هذا الرقم عند تعديل شكل الملفات المصدّرة
+EXPORT_VERSION = "2"
+EXPORT_FORMATS = ("docx", "txt")
+
+# عناوين الملفات كما تكتبها combine_texts في app.py: "--- ملف: name ---"
+_HEADING = re.compile(r"^--- (?:ملف: )?(.+?) ---$")
+# أحرف تحكم غير مسموحة في XML (تظهر أحياناً في نصوص PDF)
+_INVALID_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_R}/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_R}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:styles xmlns:w="{_W}">'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/>'
+    '<w:pPr><w:spacing w:after="120"/></w:pPr><w:rPr><w:sz w:val="22"/><w:szCs w:val="22"/></w:rPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:basedOn w:val="Normal"/>'
+    '<w:next w:val="Normal"/><w:qFormat/><w:pPr><w:keepNext/><w:spacing w:before="360" w:after="120"/>'
+    '<w:outlineLvl w:val="0"/></w:pPr><w:rPr><w:b/><w:bCs/><w:sz w:val="32"/><w:szCs w:val="32"/></w:rPr></w:style>'
+    '</w:styles>'
+)
+# حجم ما يُجمع من XML قبل كتابته في الـ zip
+_FLUSH_CHARS = 64 * 1024
+
+
+def _iter_lines(text):
+    """مثل text.split("\n") لكن كمولّد، فلا تُنسخ كل الأسطر في الذاكرة معاً"""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_blocks(text, sections=None):
+    """تحويل النص إلى (نوع، نص): heading لكل عنوان ملف، paragraph لكل سطر غير فارغ.
+
+    Document.from_files يفصل الصفحات والشرائح والأسطر بسطر واحد، فلو جُمعت
+    الأسطر حتى السطر الفارغ لصار الملف كله فقرة واحدة، ولقلب حرف عربي واحد
+    اتجاه الملف كله. لذلك كل سطر فقرة مستقلة باتجاهها.
+    """
+    for line in _iter_lines(text):
+        line = line.strip()
+        if not line:
+            continue
+        match = _HEADING.match(line)
+        if match:
+            yield "heading", match.group(1)
+        else:
+            yield "paragraph", line
+    for heading, body in sections or ():
+        yield "heading", heading
+        yield from (block for block in iter_blocks(body) if block[0] == "paragraph")
+
+
+def _paragraph_xml(kind, text):
+    text = _INVALID_XML.sub("", text)
+    rtl = bool(ARABIC.search(text))
+    props = ('<w:pStyle w:val="Heading1"/>' if kind == "heading" else "") + ("<w:bidi/>" if rtl else "")
+    run_props = "<w:rPr><w:rtl/></w:rPr>" if rtl else ""
+    return f'<w:p><w:pPr>{props}</w:pPr><w:r>{run_props}<w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+
+def write_docx(fileobj, text, sections=None):
+    """كتابة ملف Word إلى fileobj فقرة بفقرة؛ sections: قائمة (عنوان، نص) تُضاف بعد النص"""
+    with tracing.span("docx_export", characters=len(text)) as span, \
+            zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _PACKAGE_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+        zf.writestr("word/styles.xml", _STYLES)
+        paragraphs = 0
+        with zf.open("word/document.xml", "w") as doc:
+            buffer = [f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{_W}"><w:body>']
+            size = 0
+            for kind, block in iter_blocks(text, sections):
+                buffer.append(_paragraph_xml(kind, block))
+                size += len(buffer[-1])
+                paragraphs += 1
+                if size > _FLUSH_CHARS:
+                    doc.write("".join(buffer).encode("utf-8"))
+                    buffer, size = [], 0
+            buffer.append("<w:sectPr/></w:body></w:document>")
+            doc.write("".join(buffer).encode("utf-8"))
+        span.add(paragraphs=paragraphs)
+
+
+def create_docx_file(text, sections=None):
+    """ملف Word كبايتات (للنصوص الصغيرة؛ للكبيرة استخدم export_file أو write_docx)"""
+    bio = io.BytesIO()
+    write_docx(bio, text, sections)
+    return bio.getvalue()
+
+
+def export_key(text, fmt):
+    return content_hash(text, EXPORT_VERSION, fmt)
+
+
+def export_file(text, fmt, key=None, directory=EXPORT_DIR):
+    """مسار ملف التصدير؛ يُنشأ فقط إذا لم يكن موجوداً لنفس المحتوى"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    key = key or export_key(text, fmt)
+    path = os.path.join(directory, f"{key}.{fmt}")
+    if os.path.exists(path):
+        os.utime(path)
+        tracing.cache_result("exports", hits=1)
+        return path
+    tracing.cache_result("exports", misses=1)
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        if fmt == "docx":
+            write_docx(fh, text)
+        else:
+            fh.write(text.encode("utf-8"))
+    os.replace(tmp, path)
+    prune(directory)
+    return path
+
+
+def prune(directory=EXPORT_DIR, max_bytes=EXPORT_MAX_BYTES):
+    """حذف أقدم الملفات حتى يصبح حجم المجلد أقل من max_bytes"""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,235 @@
+"""استخراج النصوص من الملفات - بدون Streamlit حتى تعمل الدوال داخل عمليات منفصلة."""
+import io
+import multiprocessing
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pdfplumber
+
+import ooxml
+import storage
+import tracing
+
+# غيّر هذا الرقم عند تعديل منطق الاستخراج حتى لا تُستخدم نتائج قديمة من الكاش
+EXTRACTOR_VERSION = "7"
+
+IMAGE_EXTS = ('png', 'jpg', 'jpeg')
+
+# أقل عدد صفحات في الجزء الواحد من ملف PDF (أقل من ذلك لا تستحق كلفة نقلها لعملية أخرى)
+MIN_PAGES_PER_SHARD = 8
+# دقة تحويل الصفحات الممسوحة ضوئياً إلى صور قبل OCR
+OCR_RESOLUTION = 200
+
+# سجل واحد من خط الاستخراج: رقم الملف، رقم الصفحة/الشريحة/الفقرة، النص، الخطأ،
+# وبيانات إضافية عن الجزء (مثل {"ocr": True} للنص المقروء من صورة).
+# السجل الذي يكون فيه unit و text = None يعني انتهاء كل العمل على هذا الملف.
+Record = namedtuple("Record", "file unit text error meta", defaults=(None,))
+OCR_META = {"ocr": True}
+
+
+def file_kind(file_name):
+    """نوع الملف حسب الامتداد: image / pdf / docx / pptx"""
+    ext = file_name.lower().rsplit('.', 1)[-1]
+    if ext in IMAGE_EXTS:
+        return 'image'
+    if ext in ('pdf', 'docx', 'pptx'):
+        return ext
+    return None
+
+
+def pdf_page_count(source):
+    with storage.open_source(source) as fh, pdfplumber.open(fh) as pdf:
+        return len(pdf.pages)
+
+
+def _is_scanned(page):
+    """صفحة بلا نص وفيها صور = صفحة ممسوحة ضوئياً"""
+    return not page.chars and bool(page.images)
+
+
+def extract_pdf_pages(source, start, stop, resolution=OCR_RESOLUTION, spool_dir=None):
+    """استخراج الصفحات [start, stop) من ملف PDF (بايتات أو مسار).
+
+    تعيد قائمة (رقم الصفحة، النص، صورة PNG) حيث تكون الصورة موجودة فقط
+    للصفحات الممسوحة ضوئياً التي تحتاج OCR. مع spool_dir تُكتب الصورة في ملف
+    داخله ويُعاد مساره بدل البايتات.
+    """
+    results = []
+    with storage.open_source(source) as fh, pdfplumber.open(fh, pages=range(start + 1, stop + 1)) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            png = None
+            if not page_text and _is_scanned(page):
+                image = page.to_image(resolution=resolution).original
+                if spool_dir is not None:
+                    png = storage.spool_image(image, spool_dir)
+                else:
+                    bio = io.BytesIO()
+                    image.save(bio, format="PNG")
+                    png = bio.getvalue()
+            results.append((page.page_number - 1, page_text or "", png))
+            # تحرير الكائنات المحللة للصفحة حتى لا تتراكم في الذاكرة
+            page.close()
+    return results
+
+
+def pdf_shards(page_count, workers):
+    """تقسيم الصفحات إلى أجزاء متقاربة بعدد العمال تقريباً"""
+    size = max(MIN_PAGES_PER_SHARD, -(-page_count // max(workers, 1)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+# المحللات التي تستهلك المعالج فقط وتعمل داخل الـ process pool (قراءة XML مباشرة، انظر ooxml.py).
+# تعيد (رقم، النص)، أو (رقم، None، [صور]) لجزء بلا نص يحتاج OCR (شريحة صور فقط).
+CPU_PARSERS = {
+    'docx': ooxml.docx_units,
+    'pptx': ooxml.pptx_units,
+}
+
+
+def join_units(units):
+    """تجميع (رقم، نص[، meta]) بالترتيب في نص واحد (join مرة واحدة بدل += المتكرر)"""
+    return "".join(u[1] + "\n" for u in sorted(units, key=lambda u: u[0]))
+
+
+def extract_pdf(source, reader=None):
+    """النسخة المتسلسلة: الصفحات الممسوحة تُقرأ بـ OCR فقط إذا توفر القارئ"""
+    units = []
+    for index, page_text, png in extract_pdf_pages(source, 0, pdf_page_count(source)):
+        if png is not None and reader is not None:
+            from ocr import ocr_image
+            page_text = ocr_image(reader, png)
+        if page_text:
+            units.append((index, page_text))
+    return join_units(units)
+
+
+def extract_text(file_name, data, reader=None):
+    """استخراج نص ملف واحد بشكل متسلسل (يرفع الاستثناء عند الخطأ)"""
+    kind = file_kind(file_name)
+    if kind == 'image':
+        from ocr import ocr_image
+        return ocr_image(reader, data)
+    if kind == 'pdf':
+        return extract_pdf(data, reader)
+    if kind in CPU_PARSERS:
+        units = []
+        for unit in CPU_PARSERS[kind](data):
+            if unit[1] is not None:
+                units.append(unit)
+            elif reader is not None:
+                from ocr import ocr_image
+                units.append((unit[0], "\n".join(t for t in (ocr_image(reader, png) for png in unit[2]) if t)))
+        return join_units(units)
+    return ""
+
+
+def make_process_pool(max_workers=None):
+    """Pool للمحللات؛ نستخدم spawn لأن torch يكون محملاً في العملية الأم"""
+    max_workers = max_workers or os.cpu_count() or 1
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def iter_extract(files, pool, ocr, workers=None):
+    """استخراج عدة ملفات بالتوازي مع إرجاع النتائج فور وصولها.
+
+    files: قائمة (الاسم، البايتات أو المسار). يولّد Record لكل صفحة/شريحة/فقرة بترتيب
+    الانتهاء وليس بترتيب الملف، ثم سجل نهاية لكل ملف. ملفات PDF تُقسم صفحاتها
+    على العمال، والصفحات الممسوحة تُرسل دفعة واحدة إلى OCR. الملف المُمرر كمسار
+    لا يُنقل إلى العمال كبايتات، وصور صفحاته الممسوحة تنتظر OCR على القرص.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = {}
+    started = {}
+    outstanding = [0] * len(files)
+    images = deque()
+
+    def track(fut, i, tag, extra=None):
+        pending[fut] = (i, tag, extra)
+        started[fut] = time.perf_counter()
+        outstanding[i] += 1
+
+    for i, (name, data) in enumerate(files):
+        kind = file_kind(name)
+        if kind == 'pdf':
+            try:
+                shards = pdf_shards(pdf_page_count(data), workers)
+            except Exception as e:
+                yield Record(i, None, "", e)
+                shards = []
+            for start, stop in shards:
+                spool_dir = storage.PAGES_DIR if isinstance(data, str) else None
+                track(pool.submit(extract_pdf_pages, data, start, stop, OCR_RESOLUTION, spool_dir), i, 'pdf')
+        elif kind in CPU_PARSERS:
+            track(pool.submit(CPU_PARSERS[kind], data), i, 'units')
+        elif kind == 'image':
+            images.append(i)
+            outstanding[i] += 1
+        if not outstanding[i]:
+            yield Record(i, None, None, None)
+
+    while pending or images:
+        # الصور تُرسل بقدر ما يتسع طابور OCR حتى لا يتوقف المولّد عن إرجاع النتائج
+        while images:
+            fut = ocr.try_submit(files[images[0]][1])
+            if fut is None:
+                break
+            i = images.popleft()
+            outstanding[i] -= 1
+            track(fut, i, 'image')
+        if not pending:
+            time.sleep(0.05)
+            continue
+        done, _ = wait(pending, timeout=0.1 if images else None, return_when=FIRST_COMPLETED)
+        for fut in done:
+            i, tag, extra = pending.pop(fut)
+            # المدة من الإرسال حتى الانتهاء (تشمل الانتظار في الـ pool)؛ زمن OCR نفسه يُسجل في ocr.py
+            elapsed = time.perf_counter() - started.pop(fut)
+            outstanding[i] -= 1
+            try:
+                result = fut.result()
+            except Exception as e:
+                yield Record(i, None, "", e)
+                result = None
+            if tag == 'ocr_pages':
+                # صور الصفحات المكتوبة على القرص لم تعد مطلوبة
+                storage.discard(png for _, png in extra)
+            if tag == 'pdf':
+                pages = result or []
+                tracing.observe("extract_pdf", elapsed, result is None, pages=len(pages),
+                                scanned_pages=sum(1 for p in pages if p[2] is not None),
+                                characters=sum(len(p[1] or "") for p in pages))
+            elif tag == 'units':
+                tracing.observe(f"extract_{file_kind(files[i][0])}", elapsed, result is None,
+                                units=len(result or []), characters=sum(len(u[1] or "") for u in result or []))
+            if result is None:
+                pass
+            elif tag == 'units':
+                for unit in result:
+                    if unit[1] is not None:
+                        yield Record(i, unit[0], unit[1], None)
+                    else:
+                        track(ocr.submit_batch(unit[2]), i, 'ocr_unit', unit[0])
+            elif tag == 'image':
+                yield Record(i, 0, result, None, OCR_META)
+            elif tag == 'pdf':
+                scanned = []
+                for index, page_text, png in result:
+                    if png is not None:
+                        scanned.append((index, png))
+                    elif page_text:
+                        yield Record(i, index, page_text, None)
+                if scanned:
+                    track(ocr.submit_batch([png for _, png in scanned]), i, 'ocr_pages', scanned)
+            elif tag == 'ocr_pages':
+                for (index, _), page_text in zip(extra, result):
+                    if page_text:
+                        yield Record(i, index, page_text, None, OCR_META)
+            elif tag == 'ocr_unit':
+                text = "\n".join(t for t in result if t)
+                if text:
+                    yield Record(i, extra, text, None, OCR_META)
+            if not outstanding[i]:
+                yield Record(i, None, None, None)
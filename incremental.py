@@ -0,0 +1,186 @@
+"""إعادة المعالجة التدريجية بعد تعديل النص المستخرج.
+
+chunk_text يملأ كل جزء حتى الميزانية، فتعديل جملة في أول النص يزيح حدود كل
+الأجزاء بعده ويعيد تلخيص المستند كاملاً. هنا تُحدد نهاية الجزء من محتوى
+الجملة نفسها (content-defined chunking): الجملة التي تنتهي عندها فقرة أو
+تحقق بصمتها شرطاً تُنهي الجزء إذا وصل إلى حد أدنى من التوكنات. بعد التعديل
+تعود الحدود إلى مواضعها القديمة بعد الجزء المعدل مباشرة، فتبقى مفاتيح كاش
+الأجزاء الأخرى كما هي.
+
+IncrementalSummarizer و IncrementalTranslator يحتفظان بنتائج آخر نسخة لكل
+جلسة، ويقارنان النسخة الجديدة بها (difflib) فلا يمر على النموذج إلا ما تغير.
+"""
+import threading
+import zlib
+from difflib import SequenceMatcher
+from functools import partial
+
+from summarize import DEFAULT_CHUNK_TOKENS, iter_units, sentence_pieces, summarize_document, token_counts
+
+# الجزء لا ينتهي قبل أن يصل إلى هذه النسبة من max_tokens
+MIN_CHUNK_RATIO = 0.6
+# احتمال أن تكون نهاية فقرة / جملة عادية حداً للجزء هو 1 على هذا الرقم
+PARAGRAPH_DIVISOR = 2
+SENTENCE_DIVISOR = 8
+# أجزاء الترجمة: أسطر متتالية بين حدين من الأحرف
+LINE_CHUNK_MIN_CHARS = 1000
+LINE_CHUNK_MAX_CHARS = 4000
+LINE_DIVISOR = 4
+# حد حجم ذاكرة عدد التوكنات لكل جملة قبل تفريغها
+MAX_MEMO_SENTENCES = 200_000
+
+
+def _hash(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def stable_chunks(text, tokenizer=None, max_tokens=DEFAULT_CHUNK_TOKENS, split_headings=True, counts=None):
+    """مثل summarize.chunk_text لكن بحدود تعتمد على المحتوى وليس على الموضع.
+
+    counts: قاموس اختياري (جملة -> عدد توكنات) يُعاد استخدامه بين الاستدعاءات
+    حتى لا يُعاد تمرير النص كله على الـ tokenizer بعد كل تعديل.
+    """
+    units = list(iter_units(text))
+    sentences = [sentence for sentence, _, _ in units]
+    if counts is None:
+        numbers = token_counts(tokenizer, sentences)
+    else:
+        missing = list({s for s in sentences if s not in counts})
+        counts.update(zip(missing, token_counts(tokenizer, missing)))
+        numbers = [counts[s] for s in sentences]
+    min_tokens = int(max_tokens * MIN_CHUNK_RATIO)
+    chunks, current, used = [], [], 0
+    for (sentence, heading, paragraph_end), count in zip(units, numbers):
+        heading = heading and split_headings
+        for piece, piece_count in sentence_pieces(sentence, count, max_tokens):
+            if current and (used + piece_count > max_tokens or heading):
+                chunks.append(" ".join(current))
+                current, used = [], 0
+            heading = False
+            current.append(piece)
+            used += piece_count
+        divisor = PARAGRAPH_DIVISOR if paragraph_end else SENTENCE_DIVISOR
+        if used >= min_tokens and _hash(sentence) % divisor == 0:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def line_chunks(text, min_chars=LINE_CHUNK_MIN_CHARS, max_chars=LINE_CHUNK_MAX_CHARS):
+    """أسطر متتالية بحدود تعتمد على المحتوى؛ "\n".join(line_chunks(text)) == text"""
+    chunks, current, used = [], [], 0
+    for line in text.split("\n"):
+        current.append(line)
+        used += len(line) + 1
+        if used >= max_chars or (used >= min_chars and _hash(line) % LINE_DIVISOR == 0):
+            chunks.append("\n".join(current))
+            current, used = [], 0
+    if current or not chunks:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def diff_chunks(old, new):
+    """لكل جزء في new: رقم الجزء المطابق في old، أو None إذا كان جديداً أو معدلاً"""
+    sources = [None] * len(new)
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            sources[j1:j2] = range(i1, i2)
+    return sources
+
+
+class _RunCache:
+    """كاش ملخصات التشغيل الحالي: نتائج النسخة السابقة من الذاكرة أولاً ثم الكاش الدائم"""
+
+    def __init__(self, previous, cache):
+        self.previous = previous
+        self.cache = cache
+        self.used = {}
+
+    def get(self, key, default=None):
+        value = self.previous.get(key)
+        if value is None and self.cache is not None:
+            value = self.cache.get(key)
+        if value is None:
+            return default
+        self.used[key] = value
+        return value
+
+    def set(self, key, value):
+        self.used[key] = value
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+
+class IncrementalSummarizer:
+    """تلخيص نسخ متتالية من نفس النص (جلسة واحدة).
+
+    يحفظ ملخصات أجزاء آخر نسخة في الذاكرة، والأجزاء تُقسم بـ stable_chunks،
+    فبعد تعديل صغير لا يُلخص من جديد إلا الجزء المعدل والمستويات فوقه.
+    changed / total: عدد الأجزاء المتغيرة وعدد الأجزاء الكلي في آخر تشغيل.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.changed = 0
+        self.total = 0
+        self._chunks = []
+        self._summaries = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def summarize(self, summarizer, text, chunk_tokens=DEFAULT_CHUNK_TOKENS, **options):
+        """نفس معاملات summarize.summarize_document"""
+        with self._lock:
+            if len(self._counts) > MAX_MEMO_SENTENCES:
+                self._counts.clear()
+            chunker = partial(stable_chunks, counts=self._counts)
+            chunks = chunker(text, getattr(summarizer, "tokenizer", None), chunk_tokens)
+            sources = diff_chunks(self._chunks, chunks)
+            self.changed, self.total = sources.count(None), len(chunks)
+            run_cache = _RunCache(self._summaries, self.cache)
+            summary = summarize_document(summarizer, text, chunk_tokens=chunk_tokens, cache=run_cache,
+                                         chunker=chunker, **options)
+            # نحتفظ بملخصات هذه النسخة فقط، فلا تكبر الذاكرة مع كثرة التعديلات
+            self._chunks, self._summaries = chunks, run_cache.used
+            return summary
+
+
+class IncrementalTranslator:
+    """ترجمة نسخ متتالية من نفس النص: الأسطر غير المتغيرة تُؤخذ من الترجمة السابقة.
+
+    الأجزاء المتغيرة تُرسل معاً في استدعاء واحد للـ backend حتى تبقى الترجمة على دفعات.
+    """
+
+    def __init__(self):
+        self.changed = 0
+        self.total = 0
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def translate(self, backend, text, dest, on_progress=None):
+        with self._lock:
+            chunks = line_chunks(text)
+            old_chunks, old_out = self._previous.get((backend.name, dest), ([], []))
+            sources = diff_chunks(old_chunks, chunks)
+            out = [old_out[s] if s is not None else None for s in sources]
+            changed = [i for i, s in enumerate(sources) if s is None]
+            self.changed, self.total = len(changed), len(chunks)
+            if changed:
+                lines = backend.translate("\n".join(chunks[i] for i in changed), dest,
+                                          on_progress=on_progress).split("\n")
+                sizes = [chunks[i].count("\n") + 1 for i in changed]
+                if len(lines) == sum(sizes):
+                    pos = 0
+                    for i, size in zip(changed, sizes):
+                        out[i] = "\n".join(lines[pos:pos + size])
+                        pos += size
+                else:
+                    # ترجمة أضافت أسطراً (googletrans مثلاً): كل جزء وحده حتى لا تختلط الأسطر
+                    for i in changed:
+                        out[i] = backend.translate(chunks[i], dest)
+            self._previous = {(backend.name, dest): (chunks, out)}
+            return "\n".join(out)
@@ -0,0 +1,144 @@
+"""مهام في الخلفية (استخراج، تلخيص، ترجمة) تستمر بعد إعادة تشغيل سكربت Streamlit.
+
+حالة كل مهمة (الحالة، التقدم، النتيجة) محفوظة في جدول SQLite على القرص،
+والتنفيذ يتم في pool محدود من الخيوط مشترك بين كل المستخدمين.
+مهمة بنفس مفتاح مهمة جارية (نفس الملفات أو نفس النص والمعاملات) تشترك معها في
+التنفيذ؛ المهام المنتهية لا يعاد استخدامها لأن نتائجها الصحيحة موجودة في الكاش،
+والنتائج الناقصة (أخطاء ملفات، ملخص مختصر بعد نفاد الوقت) يجب أن يعاد حسابها.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import batching
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+# أقل مدة بين عمليتي حذف للمهام القديمة
+PRUNE_INTERVAL = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    partial BLOB,
+    result BLOB,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, created);
+"""
+
+
+class JobManager:
+    """جدول المهام + العمال.
+
+    handler(payload, report) -> result
+    report(progress, message=None, partial=None) لتحديث التقدم والنتيجة الجزئية.
+    """
+
+    def __init__(self, db_path, max_workers=2, keep_seconds=24 * 3600):
+        self.db_path = db_path
+        self.keep_seconds = keep_seconds
+        self.handlers = {}
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._submit_lock = threading.Lock()
+        self._pruned = 0.0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+            # مهام لم تنته عندما توقف السيرفر: لا يوجد عامل يكملها بعد الآن
+            db.execute("UPDATE jobs SET status = ?, error = ? WHERE status IN (?, ?)",
+                       (FAILED, "interrupted", QUEUED, RUNNING))
+        self.prune()
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def prune(self):
+        """حذف المهام التي لم تتحدث منذ keep_seconds (نتائجها المخزنة قد تكون نصوصاً كاملة)"""
+        self._pruned = time.time()
+        with self._db() as db:
+            db.execute("DELETE FROM jobs WHERE updated < ? AND status IN (?, ?)",
+                       (self._pruned - self.keep_seconds, DONE, FAILED))
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def submit(self, kind, payload, key=None):
+        """إرسال مهمة وإرجاع رقمها؛ إذا وُجدت مهمة جارية أو منتظرة بنفس المفتاح نعيد رقمها"""
+        with self._submit_lock:
+            if time.time() - self._pruned > PRUNE_INTERVAL:
+                self.prune()
+            if key is not None:
+                row = self._db().execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND key = ? AND status IN (?, ?) ORDER BY created DESC LIMIT 1",
+                    (kind, key, QUEUED, RUNNING)).fetchone()
+                if row:
+                    return row[0]
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            with self._db() as db:
+                db.execute("INSERT INTO jobs (id, kind, key, status, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                           (job_id, kind, key, QUEUED, now, now))
+        self._executor.submit(self._run, job_id, kind, payload)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._db() as db:
+            db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _run(self, job_id, kind, payload):
+        self._update(job_id, status=RUNNING)
+
+        def report(progress, message=None, partial=None):
+            fields = {"progress": float(progress)}
+            if message is not None:
+                fields["message"] = message
+            if partial is not None:
+                fields["partial"] = pickle.dumps(partial)
+            self._update(job_id, **fields)
+
+        try:
+            # طلبات المهمة للنماذج المشتركة تُنسب إليها، فيتناوب المجدول بين المهام
+            with batching.session(job_id):
+                result = self.handlers[kind](payload, report)
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            self._update(job_id, status=DONE, progress=1.0, result=pickle.dumps(result), partial=None)
+
+    def get(self, job_id):
+        """حالة المهمة كقاموس، أو None إذا لم تكن موجودة"""
+        row = self._db().execute(
+            "SELECT kind, status, progress, message, partial, result, error FROM jobs WHERE id = ?",
+            (job_id,)).fetchone()
+        if row is None:
+            return None
+        kind, status, progress, message, partial, result, error = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "progress": progress,
+            "message": message,
+            "partial": pickle.loads(partial) if partial else None,
+            "result": pickle.loads(result) if result else None,
+            "error": error,
+        }
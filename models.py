@@ -0,0 +1,282 @@
+"""تحميل النماذج عند أول استخدام فقط، كل نموذج مستقل عن الآخر.
+
+المكتبات الثقيلة (torch / transformers / easyocr) لا تُستورد إلا داخل دوال
+التحميل، فالمستخدم الذي يرفع ملف Word فقط لا ينتظر تحميل OCR أو BART.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+from cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+OCR_LANGS = ['ar', 'en']
+# قراءات إضافية بلغة واحدة حسب خط الصورة (انظر ocr.BatchOcr)؛ UNIBRAIN_OCR_ADAPTIVE=0 لتعطيلها
+ADAPTIVE_OCR = os.environ.get("UNIBRAIN_OCR_ADAPTIVE", "1") != "0"
+# ميزانية ذاكرة القراءات الإضافية (ميغابايت)، والحد الأدنى للذاكرة المتاحة قبل تحميل قارئ جديد
+OCR_READERS_BUDGET = int(os.environ.get("UNIBRAIN_OCR_READERS_MB", "512")) * 1024 * 1024
+MIN_AVAILABLE_MEMORY = 512 * 1024 * 1024
+# نسخة خفيفة من BART للسيرفرات المجانية
+SUMMARIZER_MODEL = "sshleifer/distilbart-cnn-12-6"
+# fp32: الأصلي، int8: تكميم ديناميكي لطبقات Linear،
+# onnx: تصدير عبر optimum + onnxruntime (اختياري: pip install optimum[onnxruntime])
+SUMMARIZER_MODES = ("fp32", "int8", "onnx")
+# نسخة ONNX المصدّرة من الملخص: التصدير بطيء، فيحدث مرة واحدة ويُحمّل من هنا بعدها
+ONNX_DIR = os.path.join(DEFAULT_CACHE_DIR, "onnx", SUMMARIZER_MODEL.replace("/", "--"))
+# نموذج تضمين صغير متعدد اللغات (يدعم العربية) لوضع "التركيز على موضوع"
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+class LazyModel:
+    """نموذج يُحمّل مرة واحدة عند أول طلب (آمن مع تعدد الخيوط)"""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+        self._warming = None
+
+    @property
+    def loaded(self):
+        return self._value is not None
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    start = time.perf_counter()
+                    self._value = self.loader()
+                    self.load_seconds = time.perf_counter() - start
+                    tracing.observe(f"load_{self.name}", self.load_seconds)
+        return self._value
+
+    def warm_up(self):
+        """تحميل النموذج في الخلفية إذا لم يكن محملاً أو قيد التحميل"""
+        if self.loaded or (self._warming is not None and self._warming.is_alive()):
+            return
+        self._warming = threading.Thread(target=self._warm, name=f"warmup-{self.name}", daemon=True)
+        self._warming.start()
+
+    def _warm(self):
+        try:
+            self.get()
+        except Exception:
+            # الخطأ سيظهر للمستخدم عند الاستخدام الفعلي للنموذج
+            pass
+
+
+def load_reader(langs=None, detector=True):
+    import easyocr
+    return easyocr.Reader(list(langs or OCR_LANGS), detector=detector)
+
+
+def _module_bytes(reader):
+    """حجم أوزان شبكات القارئ (الكاشف والمتعرف) في الذاكرة"""
+    total = 0
+    for name in ("detector", "recognizer"):
+        module = getattr(reader, name, None)
+        if hasattr(module, "parameters"):
+            total += sum(p.numel() * p.element_size() for p in module.parameters())
+    return total
+
+
+def available_memory():
+    """الذاكرة المتاحة في النظام بالبايت (من /proc/meminfo)، أو None إذا لم تُعرف"""
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class ReaderPool:
+    """قراءات EasyOCR مخزنة حسب اللغات.
+
+    القارئ الكامل (OCR_LANGS) دائم ويُستخدم للكشف عن أماكن النص في كل الصور.
+    القراءات الأخرى تُحمّل للتعرف فقط (detector=False) وتُطرد الأقدم استخداماً
+    عند تجاوز max_bytes أو عند نقص ذاكرة النظام؛ وإذا تعذر تحميل قارئ يُستخدم الكامل.
+    """
+
+    def __init__(self, base, loader=load_reader, max_bytes=OCR_READERS_BUDGET, min_available=MIN_AVAILABLE_MEMORY):
+        self.base = base
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.min_available = min_available
+        self._readers = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self):
+        return sum(self._sizes.values())
+
+    def get(self, langs):
+        langs = tuple(langs)
+        if langs == tuple(OCR_LANGS):
+            return self.base.get()
+        with self._lock:
+            if langs in self._readers:
+                self._readers.move_to_end(langs)
+                return self._readers[langs]
+            self._evict(low_memory=True)
+            available = available_memory()
+            if available is not None and available < self.min_available:
+                return self.base.get()
+            start = time.perf_counter()
+            try:
+                reader = self.loader(langs, detector=False)
+            except Exception:
+                return self.base.get()
+            tracing.observe(f"load_ocr_{'_'.join(langs)}", time.perf_counter() - start)
+            self._readers[langs] = reader
+            self._sizes[langs] = _module_bytes(reader)
+            self._evict(keep=langs)
+            return reader
+
+    def _evict(self, keep=None, low_memory=False):
+        while self._readers:
+            over = self.total_bytes > self.max_bytes
+            if not over and low_memory:
+                available = available_memory()
+                over = available is not None and available < self.min_available
+            if not over:
+                return
+            victim = next((langs for langs in self._readers if langs != keep), None)
+            if victim is None:
+                return
+            del self._readers[victim]
+            del self._sizes[victim]
+
+
+class InferencePipeline:
+    """غلاف حول pipeline يشغّل كل استدعاء داخل torch.inference_mode"""
+
+    def __init__(self, pipe, mode):
+        self.pipe = pipe
+        self.mode = mode
+        # يدخل في مفتاح كاش الملخصات لأن مخرجات int8/onnx تختلف قليلاً عن fp32
+        self.model_id = f"{SUMMARIZER_MODEL}:{mode}"
+        self.tokenizer = pipe.tokenizer
+        self.model = pipe.model
+
+    def __call__(self, *args, **kwargs):
+        import torch
+        with torch.inference_mode():
+            return self.pipe(*args, **kwargs)
+
+
+def export_onnx(model_class, tokenizer_class):
+    """تصدير الملخص إلى ONNX_DIR؛ يُكتب في مجلد مؤقت ثم يُنقل حتى لا تُحمّل عملية أخرى تصديراً ناقصاً"""
+    os.makedirs(os.path.dirname(ONNX_DIR), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(ONNX_DIR), prefix=".export-")
+    try:
+        model_class.from_pretrained(SUMMARIZER_MODEL, export=True).save_pretrained(tmp)
+        tokenizer_class.from_pretrained(SUMMARIZER_MODEL).save_pretrained(tmp)
+        try:
+            os.rename(tmp, ONNX_DIR)
+        except OSError:
+            # عملية أخرى أنهت التصدير قبلنا
+            if not os.path.isdir(ONNX_DIR):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_summarizer(mode=None, threads=None):
+    """تحميل الملخص بنمط الاستدلال المطلوب.
+
+    الافتراضي من متغيرات البيئة UNIBRAIN_SUMMARIZER_MODE و UNIBRAIN_TORCH_THREADS.
+    """
+    mode = mode or os.environ.get("UNIBRAIN_SUMMARIZER_MODE", "fp32")
+    threads = threads or int(os.environ.get("UNIBRAIN_TORCH_THREADS", "0"))
+    if mode not in SUMMARIZER_MODES:
+        raise ValueError(f"unknown summarizer mode: {mode}")
+    import torch
+    from transformers import AutoTokenizer, pipeline
+    if threads:
+        torch.set_num_threads(threads)
+
+    if mode == "onnx":
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        if not os.path.isdir(ONNX_DIR):
+            export_onnx(ORTModelForSeq2SeqLM, AutoTokenizer)
+        model = ORTModelForSeq2SeqLM.from_pretrained(ONNX_DIR, session_options=options)
+        pipe = pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(ONNX_DIR))
+    else:
+        pipe = pipeline("summarization", model=SUMMARIZER_MODEL)
+        if mode == "int8":
+            pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return InferencePipeline(pipe, mode)
+
+
+def load_embedder():
+    from transformers import AutoModel, AutoTokenizer
+    from embeddings import Embedder
+    tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    model = AutoModel.from_pretrained(EMBEDDING_MODEL).eval()
+    return Embedder(tokenizer, model, EMBEDDING_MODEL)
+
+
+def load_shared_summarizer():
+    """الملخص المشترك بين الجلسات: الطلبات المتزامنة تُجمع في دفعة واحدة (انظر batching.py)"""
+    from batching import BatchedPipeline
+    return BatchedPipeline(load_summarizer(), name="summarizer-batcher")
+
+
+MODELS = {
+    "ocr": LazyModel("ocr", load_reader),
+    "summarizer": LazyModel("summarizer", load_shared_summarizer),
+    "embedder": LazyModel("embedder", load_embedder),
+}
+
+
+READERS = ReaderPool(MODELS["ocr"])
+
+
+def get_reader():
+    return MODELS["ocr"].get()
+
+
+def get_reader_pool():
+    """مخزن القراءات حسب اللغة، أو None إذا كان الاختيار التلقائي معطلاً"""
+    return READERS if ADAPTIVE_OCR else None
+
+
+def get_summarizer():
+    return MODELS["summarizer"].get()
+
+
+def get_embedder():
+    return MODELS["embedder"].get()
+
+
+def warm_up(names=None):
+    """تسخين النماذج في الخلفية؛ الافتراضي من متغير البيئة UNIBRAIN_WARMUP (مثال: "ocr,summarizer").
+
+    الأسماء المتاحة هي مفاتيح MODELS. نماذج الترجمة ليست منها: كل backend في
+    translate.py يحمّل نموذج كل اتجاه لغة بنفسه عند أول ترجمة، فلا يمكن تسخينها هنا.
+    الاسم غير المعروف يُتجاهل مع تحذير بدل أن يوقف عرض الصفحة.
+    """
+    if names is None:
+        names = [n for n in os.environ.get("UNIBRAIN_WARMUP", "").split(",") if n.strip()]
+    for name in names:
+        model = MODELS.get(name.strip())
+        if model is None:
+            logger.warning("unknown model in UNIBRAIN_WARMUP: %r (available: %s)", name.strip(), ", ".join(MODELS))
+            continue
+        model.warm_up()
@@ -0,0 +1,215 @@
+"""التعرف على النصوص في الصور (EasyOCR) على دفعات وعبر طابور محدود الحجم."""
+import io
+from collections import defaultdict
+
+import numpy as np
+from PIL import Image
+
+import tracing
+from batching import DEFAULT_MAX_PER_SESSION, DEFAULT_MAX_WAIT_MS, MicroBatcher
+from preprocess import preprocess_image
+from textscript import ARABIC, LATIN
+
+# الصور تُجمع في مجموعات حسب أبعادها مقربة لأعلى إلى هذا المضاعف، ثم تُكمل بهوامش بيضاء
+SIZE_BUCKET = 64
+DEFAULT_BATCH_SIZE = 8
+# حد أقصى لمجموع البكسلات في الدفعة الواحدة حتى لا تنفجر ذاكرة كاشف CRAFT
+MAX_BATCH_PIXELS = 48 * 1024 * 1024
+# عدد مربعات النص التي يُتعرف عليها بالقارئ الكامل لتحديد خط الصورة
+SCRIPT_SAMPLE_BOXES = 4
+# لغات القارئ لكل خط. الصفحات العربية تبقى على القارئ المزدوج: نموذج EasyOCR
+# العربي واحد للغتين، والمحاضرات العربية فيها مصطلحات إنجليزية.
+SCRIPT_LANGS = {"latin": ("en",), "arabic": ("ar", "en"), "mixed": ("ar", "en")}
+# انحراف معياري لدرجات الرمادي أقل منه = صورة فارغة (بدون كشف ولا تعرف)
+BLANK_STD = 4.0
+
+
+def ocr_image(reader, data, preprocess=None):
+    """قراءة صورة واحدة وإرجاع النص"""
+    res = reader.readtext(to_rgb_array(data, preprocess), detail=0)
+    return " ".join(res)
+
+
+def to_rgb_array(image, preprocess=None):
+    """تحويل (بايتات / مسار ملف / صورة PIL / مصفوفة) إلى مصفوفة RGB، مع التجهيز إن طُلب"""
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    elif isinstance(image, str):
+        image = Image.open(image)
+    if preprocess is not None:
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(np.asarray(image))
+        image = preprocess_image(image, preprocess)
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("RGB"))
+    array = np.asarray(image)
+    if array.ndim == 2:
+        return np.repeat(array[:, :, None], 3, axis=2)
+    return array[:, :, :3]
+
+
+def text_script(text):
+    """خط النص: latin / arabic / mixed، أو None إذا لم يكن فيه حروف"""
+    arabic = bool(ARABIC.search(text))
+    latin = bool(LATIN.search(text))
+    if arabic and latin:
+        return "mixed"
+    return "arabic" if arabic else "latin" if latin else None
+
+
+def is_blank(array):
+    """صورة بلا حبر تقريباً (صفحة بيضاء)؛ تُفحص نسخة مصغرة بأخذ عينة من البكسلات"""
+    step = max(1, max(array.shape[:2]) // 256)
+    return float(array[::step, ::step].std()) < BLANK_STD
+
+
+def _round_up(value, step):
+    return -(-value // step) * step
+
+
+def _pad(array, height, width):
+    """إكمال الصورة بهوامش بيضاء حتى تتساوى أبعاد الدفعة"""
+    h, w = array.shape[:2]
+    if (h, w) == (height, width):
+        return array
+    out = np.full((height, width, 3), 255, dtype=array.dtype)
+    out[:h, :w] = array
+    return out
+
+
+class BatchOcr:
+    """خدمة OCR على دفعات فوق easyocr.Reader.
+
+    الصور ذات الأبعاد المتقاربة تُجمع وتمرّر معاً عبر readtext_batched،
+    فيعمل الكشف (CRAFT) على الدفعة كاملة ويعمل التعرف بحجم batch_size.
+
+    مع readers (models.ReaderPool) يُفصل الكشف عن التعرف: الصورة الفارغة أو التي
+    لا يُكشف فيها نص لا يُشغّل عليها التعرف، وخط الصورة يُحدد من عينة صغيرة من
+    مربعاتها ثم يُتعرف على الباقي بقارئ لغة ذلك الخط (SCRIPT_LANGS).
+    """
+
+    def __init__(self, reader, batch_size=DEFAULT_BATCH_SIZE, bucket=SIZE_BUCKET, max_batch_pixels=MAX_BATCH_PIXELS,
+                 preprocess=None, readers=None):
+        # القارئ نفسه أو دالة تعيده، فلا يُحمّل النموذج إلا عند وصول أول صورة
+        self._reader = reader
+        self.readers = readers
+        # PreprocessConfig أو None لتمرير الصور كما هي
+        self.preprocess = preprocess
+        self.batch_size = batch_size
+        self.bucket = bucket
+        self.max_batch_pixels = max_batch_pixels
+
+    @property
+    def reader(self):
+        if not hasattr(self._reader, "readtext"):
+            self._reader = self._reader()
+        return self._reader
+
+    def _batches(self, arrays):
+        groups = defaultdict(list)
+        for i, array in enumerate(arrays):
+            h, w = array.shape[:2]
+            groups[(_round_up(h, self.bucket), _round_up(w, self.bucket))].append(i)
+        for (h, w), indexes in groups.items():
+            per_batch = max(1, min(self.batch_size, self.max_batch_pixels // (h * w)))
+            for start in range(0, len(indexes), per_batch):
+                yield h, w, indexes[start:start + per_batch]
+
+    def read(self, images):
+        """قراءة قائمة صور وإرجاع نص لكل صورة بنفس الترتيب"""
+        with tracing.span("ocr_preprocess", images=len(images)):
+            arrays = [to_rgb_array(img, self.preprocess) for img in images]
+        texts = [""] * len(arrays)
+        with tracing.span("ocr", images=len(arrays), pixels=sum(a.shape[0] * a.shape[1] for a in arrays)) as span:
+            if self.readers is not None:
+                self._read_adaptive(arrays, texts, span)
+                span.add(characters=sum(len(t) for t in texts))
+                return texts
+            for h, w, indexes in self._batches(arrays):
+                if len(indexes) == 1:
+                    res = [self.reader.readtext(arrays[indexes[0]], detail=0, batch_size=self.batch_size)]
+                else:
+                    batch = [_pad(arrays[i], h, w) for i in indexes]
+                    res = self.reader.readtext_batched(batch, detail=0, batch_size=self.batch_size)
+                for i, lines in zip(indexes, res):
+                    texts[i] = " ".join(lines)
+            span.add(characters=sum(len(t) for t in texts))
+        return texts
+
+    def _script(self, image, horizontal):
+        """(خط الصورة، مربعات العينة، نتائجها) من التعرف بالقارئ الكامل على عينة موزعة من المربعات الأفقية"""
+        if not horizontal:
+            return "mixed", [], []
+        step = max(1, len(horizontal) // SCRIPT_SAMPLE_BOXES)
+        sample = horizontal[::step][:SCRIPT_SAMPLE_BOXES]
+        results = self.reader.recognize(image, horizontal_list=sample, free_list=[], detail=1)
+        return text_script(" ".join(r[1] for r in results)) or "mixed", sample, results
+
+    def _recognize(self, image, boxes, free_boxes):
+        """التعرف على مربعات صورة واحدة، مع إعادة استخدام العينة إذا كان القارئ المختار هو الكامل"""
+        script, sample, sampled = self._script(image, boxes)
+        reader = self.readers.get(SCRIPT_LANGS[script])
+        if reader is not self.reader:
+            return script, reader.recognize(image, horizontal_list=boxes, free_list=free_boxes, detail=0,
+                                            batch_size=self.batch_size)
+        taken = {id(box) for box in sample}
+        rest = [box for box in boxes if id(box) not in taken]
+        results = list(sampled)
+        if rest or free_boxes:
+            results += self.reader.recognize(image, horizontal_list=rest, free_list=free_boxes, detail=1,
+                                             batch_size=self.batch_size)
+        # نفس ترتيب EasyOCR للنتائج: من الأعلى إلى الأسفل حسب أول نقطة في المربع
+        results.sort(key=lambda r: r[0][0][1])
+        return script, [r[1] for r in results]
+
+    def _read_adaptive(self, arrays, texts, span):
+        todo = [i for i, array in enumerate(arrays) if not is_blank(array)]
+        span.add(blank_images=len(arrays) - len(todo))
+        for h, w, indexes in self._batches([arrays[i] for i in todo]):
+            indexes = [todo[k] for k in indexes]
+            if len(indexes) == 1:
+                images = [arrays[indexes[0]]]
+                horizontal, free = self.reader.detect(images[0])
+            else:
+                images = [_pad(arrays[i], h, w) for i in indexes]
+                horizontal, free = self.reader.detect(np.stack(images), reformat=False)
+            for i, image, boxes, free_boxes in zip(indexes, images, horizontal, free):
+                if not boxes and not free_boxes:
+                    # لا نص في الصورة (رسم أو صورة فوتوغرافية): لا حاجة للتعرف
+                    span.add(empty_images=1)
+                    continue
+                script, lines = self._recognize(image, boxes, free_boxes)
+                span.add(**{f"{script}_images": 1})
+                texts[i] = " ".join(lines)
+
+
+class OcrQueue:
+    """طابور OCR محدود أمام القارئ المشترك بين كل الجلسات.
+
+    الإرسال يتوقف عند امتلاء الطابور بدل تكديس الصور في الذاكرة.
+    الطلبات تمر عبر MicroBatcher: ينتظر بضع ميلي ثوان لتجميع صور الجلسات
+    المختلفة في دفعة واحدة لـ BatchOcr، ويأخذ من الجلسات بالتناوب.
+    """
+
+    def __init__(self, reader, maxsize=8, batch_size=DEFAULT_BATCH_SIZE, preprocess=None,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_per_session=DEFAULT_MAX_PER_SESSION, readers=None):
+        self.ocr = BatchOcr(reader, batch_size=batch_size, preprocess=preprocess, readers=readers)
+        # مجموعة صور كبيرة (صفحات PDF ممسوحة) تُقسم حتى لا تحجز القارئ عن الجلسات الأخرى
+        self.batcher = MicroBatcher(self._read, max_batch=batch_size, max_wait_ms=max_wait_ms,
+                                    max_per_session=max_per_session, max_request_items=batch_size,
+                                    max_pending=maxsize, name="ocr-batcher")
+
+    def _read(self, images, group):
+        return self.ocr.read(images)
+
+    def submit(self, data):
+        """إرسال صورة واحدة؛ النتيجة نص"""
+        return self.batcher.submit_one(data)
+
+    def try_submit(self, data):
+        """مثل submit لكن تعيد None بدل الانتظار إذا كان الطابور ممتلئاً"""
+        return self.batcher.submit_one(data, block=False)
+
+    def submit_batch(self, images):
+        """إرسال مجموعة صور (صفحات PDF مثلاً)؛ النتيجة قائمة نصوص بنفس الترتيب"""
+        return self.batcher.submit(images)
@@ -0,0 +1,215 @@
+"""استخراج سريع لنصوص Word و PowerPoint مباشرة من ملفات XML داخل الـ zip.
+
+بدل بناء نموذج python-docx / python-pptx الكامل في الذاكرة، يُقرأ كل جزء
+(part) بمحلل XML تدريجي (iterparse) وتُحذف العناصر بعد قراءتها. يشمل ذلك
+ما كان يضيع سابقاً: الجداول، الرؤوس والتذييلات والحواشي في Word، وملاحظات
+المتحدث والجداول والأشكال المجمعة في PowerPoint. الشرائح التي لا تحتوي إلا
+صوراً تُعاد مع صورها لتُقرأ بـ OCR.
+"""
+import posixpath
+import zipfile
+from xml.etree import ElementTree as ET
+
+import storage
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PR = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_REL_NOTES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide"
+
+# صيغ الصور التي يستطيع PIL فتحها (emf/wmf/svg تُتجاهل)
+OCR_IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff')
+NOTES_LABEL = "ملاحظات المتحدث:"
+
+
+def _rels(zf, part):
+    """علاقات جزء: {rId: (النوع، المسار الكامل داخل الـ zip)}"""
+    folder, name = posixpath.split(part)
+    path = posixpath.join(folder, "_rels", name + ".rels")
+    if path not in zf.NameToInfo:
+        return {}
+    rels = {}
+    for rel in ET.parse(zf.open(path)).getroot().iter(_PR + "Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+        rels[rel.get("Id")] = (rel.get("Type"), target)
+    return rels
+
+
+class _TextCollector:
+    """تجميع نص الفقرات وصفوف الجداول أثناء iterparse (مشترك بين Word و PowerPoint).
+
+    كل فقرة خارج الجداول سطر مستقل، وكل صف جدول سطر واحد بخلايا مفصولة بـ " | ".
+    محتوى mc:Fallback يُتجاهل لأنه نسخة ثانية من نفس النص (مربعات النص في Word).
+    """
+
+    def __init__(self, ns):
+        self.p, self.t, self.tbl, self.tr, self.tc = (ns + tag for tag in ("p", "t", "tbl", "tr", "tc"))
+        self.breaks = {ns + "br", ns + "cr"}
+        self.tab = ns + "tab"
+        self.run = ns + "r"
+        self.lines = []
+        self._para = []
+        self._cells = []
+        self._depth = 0
+        self._runs = 0
+        self._fallback = 0
+
+    def start(self, tag):
+        if tag == _MC_FALLBACK:
+            self._fallback += 1
+        if self._fallback:
+            # مثل end: لا تتغير حالة الجداول والـ runs داخل Fallback
+            return
+        if tag == self.tbl:
+            self._depth += 1
+        elif tag == self.tr and self._depth == 1:
+            self._cells = []
+        elif tag == self.tc and self._depth == 1:
+            self._cells.append([])
+        elif tag == self.run:
+            self._runs += 1
+
+    def end(self, el):
+        tag = el.tag
+        if tag == _MC_FALLBACK:
+            self._fallback -= 1
+        elif self._fallback:
+            return
+        elif tag == self.t:
+            self._para.append(el.text or "")
+        elif tag == self.tab and self._runs:
+            self._para.append("\t")
+        elif tag in self.breaks:
+            self._para.append("\n")
+        elif tag == self.run:
+            self._runs -= 1
+        elif tag == self.p:
+            text = "".join(self._para).strip()
+            self._para = []
+            if text:
+                if self._depth:
+                    self._cells[-1].append(text)
+                else:
+                    self.lines.append(text)
+            el.clear()
+        elif tag == self.tr and self._depth == 1:
+            row = [" ".join(cell) for cell in self._cells]
+            if any(row):
+                self.lines.append(" | ".join(row))
+            el.clear()
+        elif tag == self.tbl:
+            self._depth -= 1
+
+
+def _part_lines(zf, part, ns):
+    collector = _TextCollector(ns)
+    for event, el in ET.iterparse(zf.open(part), events=("start", "end")):
+        if event == "start":
+            collector.start(el.tag)
+        else:
+            collector.end(el)
+    return collector.lines
+
+
+def docx_units(source):
+    """أسطر ملف Word (بايتات أو مسار) كـ (رقم، النص): الرؤوس، ثم المتن (فقرات وصفوف جداول)، ثم التذييلات والحواشي"""
+    with storage.open_source(source) as fh, zipfile.ZipFile(fh) as zf:
+        rels = _rels(zf, "word/document.xml")
+        parts = {kind: [target for rel_type, target in rels.values()
+                        if rel_type.endswith("/" + kind) and target in zf.NameToInfo]
+                 for kind in ("header", "footer", "footnotes", "endnotes")}
+        lines = []
+        seen = set()
+        # نفس الرأس يتكرر في كل قسم: يُضاف مرة واحدة
+        for part in sorted(parts["header"]):
+            for line in _part_lines(zf, part, _W):
+                if line not in seen:
+                    seen.add(line)
+                    lines.append(line)
+        lines.extend(_part_lines(zf, "word/document.xml", _W))
+        for part in sorted(parts["footer"]) + parts["footnotes"] + parts["endnotes"]:
+            for line in _part_lines(zf, part, _W):
+                if line not in seen:
+                    seen.add(line)
+                    lines.append(line)
+    return list(enumerate(lines))
+
+
+def _slide_parts(zf):
+    """مسارات الشرائح بترتيب العرض (من presentation.xml وليس من أسماء الملفات)"""
+    rels = _rels(zf, "ppt/presentation.xml")
+    root = ET.parse(zf.open("ppt/presentation.xml")).getroot()
+    slides = []
+    for sld in root.iter(_P + "sldId"):
+        rel = rels.get(sld.get(_R + "id"))
+        if rel and rel[1] in zf.NameToInfo:
+            slides.append(rel[1])
+    return slides
+
+
+def _slide_content(zf, part):
+    """(أسطر النص، الصور المضمنة في أشكال p:pic) لشريحة واحدة"""
+    collector = _TextCollector(_A)
+    pictures = []
+    in_pic = 0
+    for event, el in ET.iterparse(zf.open(part), events=("start", "end")):
+        if event == "start":
+            if el.tag == _P + "pic":
+                in_pic += 1
+            collector.start(el.tag)
+            continue
+        if el.tag == _P + "pic":
+            in_pic -= 1
+        elif el.tag == _A + "blip" and in_pic:
+            pictures.append(el.get(_R + "embed"))
+        collector.end(el)
+    return collector.lines, pictures
+
+
+def _notes_lines(zf, part):
+    """نص ملاحظات المتحدث فقط (العنصر النائب body)، بدون رقم الشريحة وصورتها"""
+    root = ET.parse(zf.open(part)).getroot()
+    lines = []
+    for sp in root.iter(_P + "sp"):
+        ph = sp.find(f"{_P}nvSpPr/{_P}nvPr/{_P}ph")
+        if ph is None or ph.get("type") != "body":
+            continue
+        for para in sp.iter(_A + "p"):
+            text = "".join(t.text or "" for t in para.iter(_A + "t")).strip()
+            if text:
+                lines.append(text)
+    return lines
+
+
+def pptx_units(source):
+    """نص كل شريحة (مع الجداول والأشكال المجمعة وملاحظات المتحدث) كـ (رقم الشريحة، النص).
+
+    الشريحة التي لا نص فيها وفيها صور تُعاد كـ (رقم الشريحة، None، [بايتات الصور]) لتُقرأ بـ OCR.
+    """
+    units = []
+    with storage.open_source(source) as fh, zipfile.ZipFile(fh) as zf:
+        for i, part in enumerate(_slide_parts(zf)):
+            lines, pictures = _slide_content(zf, part)
+            rels = _rels(zf, part)
+            notes = [target for rel_type, target in rels.values() if rel_type == _REL_NOTES]
+            note_lines = _notes_lines(zf, notes[0]) if notes and notes[0] in zf.NameToInfo else []
+            if lines or note_lines:
+                if note_lines:
+                    lines = lines + [NOTES_LABEL] + note_lines
+                units.append((i, "\n".join(lines)))
+                continue
+            images = []
+            for rid in pictures:
+                target = rels.get(rid, (None, None))[1]
+                if target and target in zf.NameToInfo and target.lower().endswith(OCR_IMAGE_EXTS):
+                    images.append(zf.read(target))
+            if images:
+                units.append((i, None, images))
+    return units
+
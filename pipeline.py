@@ -0,0 +1,176 @@
+"""واجهة Python للمعالجة بدون Streamlit: استخراج، تلخيص وترجمة مجموعة ملفات.
+
+يستخدمها cli.py لمعالجة عدد كبير من الملفات، وتشترك مع app.py في نفس الكاش
+على القرص، فالملف الذي عولج في أحدهما لا يعاد استخراجه أو تلخيصه في الآخر.
+
+    with Pipeline(workers=8, summarize=True, translate_to="en") as pipe:
+        for result in pipe.process(paths):
+            print(result["path"], result["error"] or len(result["text"]))
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import batching
+import models
+import storage
+import tracing
+from cache import DEFAULT_CACHE_DIR, TieredCache, content_hash
+from embeddings import focus_text, open_store
+from extraction import EXTRACTOR_VERSION, IMAGE_EXTS, file_kind, iter_extract, join_units, make_process_pool
+from ocr import OcrQueue
+from preprocess import PreprocessConfig
+from summarize import summarize_document
+from translate import BACKENDS
+
+SUPPORTED_EXTS = ('pdf', 'docx', 'pptx') + IMAGE_EXTS
+
+
+def extraction_key(name, sha256):
+    """مفتاح كاش الاستخراج: بصمة المحتوى (sha256) + نسخة المستخرج + الامتداد.
+
+    يأخذ البصمة وليس البايتات حتى لا يلزم وجود الملف كاملاً في الذاكرة.
+    """
+    ext = name.lower().rsplit('.', 1)[-1]
+    return content_hash(sha256, EXTRACTOR_VERSION, ext)
+
+
+def find_files(directory):
+    """كل الملفات المدعومة داخل المجلد ومجلداته الفرعية، بترتيب ثابت"""
+    found = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        found.extend(os.path.join(root, n) for n in sorted(names) if file_kind(n))
+    return found
+
+
+class Pipeline:
+    """استخراج ثم (اختيارياً) تلخيص وترجمة، مع كاش على القرص.
+
+    workers: عدد عمليات الاستخراج وعدد الملفات التي تُلخص/تترجم معاً
+    (طلباتها للنموذج المشترك تُجمع في دفعات، انظر batching.py).
+    group_size: عدد الملفات التي يُرسل استخراجها في نفس الوقت (العمال يقرؤونها من مساراتها).
+    index: search_index.SearchIndex اختياري تُضاف إليه صفحات كل ملف بعد استخراجه.
+    topic: إن حُدد، يُلخص ويُترجم من كل ملف الأجزاء الأقرب إلى الموضوع فقط (embeddings.py).
+    """
+
+    def __init__(self, workers=None, cache_dir=DEFAULT_CACHE_DIR, summarize=False, translate_to=None,
+                 backend="marian", time_budget=None, group_size=None, index=None, topic=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.index = index
+        self.topic = topic
+        self.summarize = summarize
+        self.translate_to = translate_to
+        self.time_budget = time_budget
+        self.group_size = group_size or max(8, self.workers * 2)
+        self.extraction_cache = TieredCache(os.path.join(cache_dir, "extraction"))
+        self.summary_cache = TieredCache(os.path.join(cache_dir, "summaries"), disk_bytes=256 * 1024 * 1024)
+        self.translator = None
+        if translate_to:
+            cache = TieredCache(os.path.join(cache_dir, "translations"), disk_bytes=256 * 1024 * 1024)
+            self.translator = BACKENDS[backend](cache=cache)
+        self.pool = make_process_pool(self.workers)
+        self.ocr = OcrQueue(models.get_reader, preprocess=PreprocessConfig(), readers=models.get_reader_pool())
+        self._nlp = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nlp")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._nlp.shutdown(wait=True, cancel_futures=True)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def extract(self, files, digests):
+        """files: قائمة (الاسم، البايتات أو المسار) و digests بصماتها (sha256)؛
+        يولّد (الرقم، الأجزاء، الخطأ) لكل ملف عند انتهائه.
+
+        الأجزاء قائمة (رقم الصفحة/الشريحة، النص، meta) كما يحتاجها document.Document.
+        """
+        keys = [extraction_key(name, digest) for (name, _), digest in zip(files, digests)]
+        missing = []
+        for i, key in enumerate(keys):
+            units = self.extraction_cache.get(key)
+            if units is None:
+                missing.append(i)
+            else:
+                yield i, units, None
+        tracing.cache_result("extraction", hits=len(files) - len(missing), misses=len(missing))
+        if not missing:
+            return
+        units = {i: [] for i in missing}
+        errors = {}
+        records = iter_extract([files[i] for i in missing], self.pool, self.ocr, self.workers)
+        for record in records:
+            i = missing[record.file]
+            if record.error is not None:
+                errors.setdefault(i, record.error)
+            elif record.text is not None:
+                units[i].append((record.unit, record.text, record.meta))
+            elif i in errors:
+                yield i, [], errors[i]
+            else:
+                done = units.pop(i)
+                self.extraction_cache.set(keys[i], done)
+                yield i, done, None
+        if any(isinstance(e, BrokenProcessPool) for e in errors.values()):
+            # عملية ماتت (نفاد الذاكرة مثلاً): pool جديد للمجموعة التالية
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = make_process_pool(self.workers)
+
+    def _finish(self, result):
+        """تلخيص وترجمة نص ملف واحد (يعمل في خيوط _nlp)"""
+        text = result["text"]
+        if result["error"] is None and text.strip():
+            with batching.session(result["path"]):
+                if self.topic and (self.summarize or self.translator is not None):
+                    embedder = models.get_embedder()
+                    text = focus_text(text, self.topic, embedder, open_store(embedder.dim))
+                if self.summarize:
+                    result["summary"] = summarize_document(models.get_summarizer(), text,
+                                                           time_budget=self.time_budget, cache=self.summary_cache)
+                if self.translator is not None:
+                    result["translation"] = self.translator.translate(text, dest=self.translate_to)
+        result["seconds"] = round(time.perf_counter() - result.pop("_start"), 3)
+        return result
+
+    def process(self, paths, skip=None):
+        """معالجة قائمة مسارات وتوليد قاموس نتيجة لكل ملف بترتيب المسارات.
+
+        skip(path, sha256) -> True: يتخطى الملف (للاستكمال بعد توقف).
+        """
+        for start in range(0, len(paths), self.group_size):
+            files, results = [], []
+            for path in paths[start:start + self.group_size]:
+                result = {"path": path, "sha256": None, "text": "", "error": None,
+                          "summary": None, "translation": None, "_start": time.perf_counter()}
+                try:
+                    result["sha256"] = storage.file_sha256(path)
+                except OSError as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    results.append(result)
+                    continue
+                if skip is not None and skip(path, result["sha256"]):
+                    continue
+                # المسار وليس البايتات: العمال يقرؤون الملف بأنفسهم
+                files.append((os.path.basename(path), path))
+                results.append(result)
+
+            pending = [r for r in results if r["sha256"] is not None]
+            futures = {}
+            for i, units, error in self.extract(files, [r["sha256"] for r in pending]):
+                pending[i]["text"] = join_units(units)
+                if error is not None:
+                    pending[i]["error"] = f"{type(error).__name__}: {error}"
+                elif self.index is not None:
+                    self.index.add(pending[i]["sha256"], pending[i]["path"], units)
+                futures[id(pending[i])] = self._nlp.submit(self._finish, pending[i])
+            for result in results:
+                if id(result) in futures:
+                    yield futures[id(result)].result()
+                else:
+                    result["seconds"] = round(time.perf_counter() - result.pop("_start"), 3)
+                    yield result
@@ -0,0 +1,139 @@
+"""تجهيز الصور قبل OCR: تدوير EXIF، تدرج رمادي، تصغير، قص الهوامش وتصحيح الميلان.
+
+صورة هاتف بدقة 12 ميغابكسل تحمل نصاً يكفيه جزء صغير من هذه البكسلات،
+وكلفة EasyOCR تزيد مع عدد البكسلات، لذلك نصغّر الصورة حتى يصل ارتفاع
+سطر النص إلى قيمة مستهدفة.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+@dataclass
+class PreprocessConfig:
+    exif_transpose: bool = True
+    grayscale: bool = True
+    # أقصى طول لأطول ضلع قبل أي تحليل (تصغير سريع أولي)
+    max_side: int = 2400
+    # ارتفاع سطر النص المستهدف بالبكسل بعد التصغير (0 = بدون)
+    target_text_height: int = 28
+    crop_margins: bool = True
+    margin_pad: int = 12
+    deskew: bool = True
+    max_skew: float = 8.0
+    skew_step: float = 0.5
+    # أطول ضلع للنسخة المصغرة المستخدمة في التحليل (الهوامش، الميلان، ارتفاع السطر)
+    analysis_side: int = 800
+
+
+def otsu_threshold(gray):
+    """عتبة Otsu محسوبة من الهيستوغرام بشكل متجه"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def ink_mask(gray):
+    """البكسلات الداكنة (الحبر) على خلفية فاتحة"""
+    return gray <= otsu_threshold(gray)
+
+
+def margin_box(mask, pad=0):
+    """أصغر مستطيل يحيط بالحبر (مع هامش)، أو None إذا كانت الصورة فارغة"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return None
+    h, w = mask.shape
+    return (max(cols[0] - pad, 0), max(rows[0] - pad, 0),
+            min(cols[-1] + 1 + pad, w), min(rows[-1] + 1 + pad, h))
+
+
+def estimate_skew(mask, max_skew=8.0, step=0.5):
+    """تقدير زاوية الميلان بتجربة زوايا متعددة واختيار الأكثر حدة في مسقط الأسطر"""
+    ys, xs = np.nonzero(mask)
+    if ys.size < 50:
+        return 0.0
+    angles = np.deg2rad(np.arange(-max_skew, max_skew + step / 2, step))
+    # إسقاط كل بكسلات الحبر على المحور العمودي لكل الزوايا دفعة واحدة
+    projected = ys[None, :] * np.cos(angles)[:, None] - xs[None, :] * np.sin(angles)[:, None]
+    offset = projected.min()
+    bins = np.rint(projected - offset).astype(np.int64)
+    n_bins = int(bins.max()) + 1
+    flat = bins + (np.arange(len(angles)) * n_bins)[:, None]
+    hist = np.bincount(flat.ravel(), minlength=len(angles) * n_bins).reshape(len(angles), n_bins)
+    score = (hist.astype(np.float64) ** 2).sum(axis=1)
+    return float(np.rad2deg(angles[int(np.argmax(score))]))
+
+
+def estimate_text_height(mask):
+    """الوسيط لارتفاع أسطر النص من مسقط الصفوف"""
+    rows = mask.mean(axis=1) > 0.01
+    edges = np.diff(np.concatenate(([0], rows.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    heights = ends - starts
+    heights = heights[heights >= 4]
+    if heights.size == 0:
+        return None
+    return float(np.median(heights))
+
+
+def _scaled(img, scale):
+    if scale >= 1.0:
+        return img
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+
+def _analysis_mask(img, config):
+    """قناع الحبر على نسخة مصغرة، مع معامل التحويل إلى أبعاد الصورة الكاملة"""
+    factor = min(1.0, config.analysis_side / max(img.size))
+    small = _scaled(img.convert("L"), factor)
+    return ink_mask(np.asarray(small)), factor
+
+
+def preprocess_image(img, config=None):
+    """تطبيق مراحل التجهيز بالترتيب وإرجاع صورة PIL جاهزة لـ OCR"""
+    config = config or PreprocessConfig()
+    if config.exif_transpose:
+        img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        # خلفية بيضاء بدل الشفافية (الشفاف يصبح أسود عند التحويل المباشر)
+        rgba = img.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, rgba)
+    img = img.convert("L") if config.grayscale else img.convert("RGB")
+
+    if config.max_side and max(img.size) > config.max_side:
+        img = _scaled(img, config.max_side / max(img.size))
+
+    if config.crop_margins:
+        mask, factor = _analysis_mask(img, config)
+        box = margin_box(mask, pad=max(1, round(config.margin_pad * factor)))
+        if box is not None:
+            img = img.crop(tuple(round(v / factor) for v in box))
+
+    if config.deskew:
+        mask, _ = _analysis_mask(img, config)
+        angle = estimate_skew(mask, config.max_skew, config.skew_step)
+        if abs(angle) >= config.skew_step:
+            fill = 255 if img.mode == "L" else (255, 255, 255)
+            img = img.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+
+    if config.target_text_height:
+        mask, factor = _analysis_mask(img, config)
+        height = estimate_text_height(mask)
+        if height:
+            img = _scaled(img, config.target_text_height / (height / factor))
+    return img
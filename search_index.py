@@ -0,0 +1,160 @@
+"""فهرس بحث نصي دائم (SQLite FTS5) لكل النصوص المستخرجة.
+
+كل صفحة/شريحة/فقرة صف في الفهرس مع اسم الملف ورقم الجزء، والملفات معرّفة
+ببصمة محتواها، فالملف نفسه لا يُفهرس مرتين ويمكن حذفه بالبصمة. النص يُوحّد
+قبل الفهرسة وقبل البحث (حذف التشكيل والتطويل، توحيد الألف والتاء المربوطة
+والألف المقصورة، وحذف "ال" التعريف) حتى تطابق "معلومات" كلمة "المَعلُومات" أو "بالمعلومات".
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from cache import DEFAULT_CACHE_DIR
+from document import UNIT_KINDS
+from extraction import file_kind
+
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "search.sqlite3")
+
+# التشكيل وعلامات القرآن والألف الخنجرية
+_TASHKEEL = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_TATWEEL = "\u0640"
+_CHAR_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    _TATWEEL: None,
+})
+# أداة التعريف وما يسبقها من حروف العطف والجر: "الطاقة" و"بالطاقة" تطابقان "طاقة"
+_ARTICLE = re.compile(r"(?<!\w)(?:وال|فال|بال|كال|لل|ال)(?=[\u0621-\u064A]{2,})")
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    units INTEGER NOT NULL,
+    added REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS units_hash ON units (hash);
+-- فهارس البادئات القصيرة حتى يبقى البحث أثناء الكتابة سريعاً
+CREATE VIRTUAL TABLE IF NOT EXISTS units_fts USING fts5(
+    body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+"""
+
+Hit = namedtuple("Hit", "hash name kind unit snippet score")
+
+
+def normalize(text):
+    """توحيد النص العربي (واللاتيني إلى أحرف صغيرة) للفهرسة والبحث"""
+    return _ARTICLE.sub("", _TASHKEEL.sub("", text).translate(_CHAR_MAP).lower())
+
+
+def match_query(query):
+    """تحويل نص المستخدم إلى استعلام FTS5: كل كلمة بين علامات تنصيص (AND ضمني).
+
+    آخر كلمة تُطابق كبادئة أيضاً، فنتائج "entrop" تظهر أثناء الكتابة.
+    """
+    words = _WORD.findall(normalize(query))
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def snippet(text, query, width=16):
+    """مقتطف من النص الأصلي (بتشكيله) حول أول كلمة مطابقة، والكلمات المطابقة بخط عريض"""
+    terms = _WORD.findall(normalize(query))
+    words = text.split()
+    hits = [i for i, w in enumerate(words)
+            if any(t.startswith(term) for t in _WORD.findall(normalize(w)) for term in terms)]
+    first = hits[0] if hits else 0
+    start = max(0, first - width // 2)
+    window = words[start:start + width]
+    marked = " ".join(f"**{w}**" if start + i in hits else w for i, w in enumerate(window))
+    return ("… " if start else "") + marked + (" …" if start + width < len(words) else "")
+
+
+class SearchIndex:
+    """الفهرس على القرص؛ اتصال SQLite لكل خيط كما في jobs.JobManager"""
+
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def __contains__(self, file_hash):
+        return self._db().execute("SELECT 1 FROM files WHERE hash = ?", (file_hash,)).fetchone() is not None
+
+    def add(self, file_hash, name, units, replace=False):
+        """فهرسة ملف: units قائمة (رقم الجزء، النص[، meta]). تعيد False إذا كان مفهرساً"""
+        with self._write_lock:
+            if file_hash in self:
+                if not replace:
+                    return False
+                self._delete(file_hash)
+            kind = UNIT_KINDS.get(file_kind(name), "block")
+            with self._db() as db:
+                for unit in units:
+                    if not unit[1].strip():
+                        continue
+                    row = db.execute("INSERT INTO units (hash, kind, unit, text) VALUES (?, ?, ?, ?)",
+                                     (file_hash, kind, unit[0], unit[1])).lastrowid
+                    db.execute("INSERT INTO units_fts (rowid, body) VALUES (?, ?)", (row, normalize(unit[1])))
+                db.execute("INSERT INTO files (hash, name, units, added) VALUES (?, ?, ?, ?)",
+                           (file_hash, name, len(units), time.time()))
+        return True
+
+    def delete(self, file_hash):
+        with self._write_lock:
+            return self._delete(file_hash)
+
+    def _delete(self, file_hash):
+        with self._db() as db:
+            db.execute("DELETE FROM units_fts WHERE rowid IN (SELECT id FROM units WHERE hash = ?)", (file_hash,))
+            db.execute("DELETE FROM units WHERE hash = ?", (file_hash,))
+            return db.execute("DELETE FROM files WHERE hash = ?", (file_hash,)).rowcount > 0
+
+    def files(self):
+        """(البصمة، الاسم، عدد الأجزاء) لكل ملف مفهرس، الأحدث أولاً"""
+        return self._db().execute("SELECT hash, name, units FROM files ORDER BY added DESC").fetchall()
+
+    def search(self, query, limit=20):
+        """أفضل النتائج حسب bm25 مع موقع كل نتيجة (الملف ورقم الصفحة/الشريحة)"""
+        match = match_query(query)
+        if match is None:
+            return []
+        rows = self._db().execute(
+            """
+            SELECT u.hash, f.name, u.kind, u.unit, u.text, rank
+            FROM units_fts
+            JOIN units u ON u.id = units_fts.rowid
+            JOIN files f ON f.hash = u.hash
+            WHERE units_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """, (match, limit)).fetchall()
+        return [Hit(h, name, kind, unit, snippet(text, query), score) for h, name, kind, unit, text, score in rows]
@@ -0,0 +1,213 @@
+"""تخزين الملفات المرفوعة بذاكرة محدودة لكل جلسة.
+
+الملف الصغير يبقى في الذاكرة طالما بقي من ميزانية الجلسة ما يكفيه، وما عدا ذلك
+يُنسخ على دفعات إلى ملف على القرص (بدون نسخة كاملة في الذاكرة) ويُفتح لاحقاً
+عبر mmap. عمليات الاستخراج تستقبل مسار الملف بدل البايتات، وصفحات PDF
+الممسوحة لملف على القرص تُكتب صورها على القرص أيضاً وتُحذف بعد OCR.
+"""
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from cache import DEFAULT_CACHE_DIR
+
+SPOOL_DIR = os.path.join(DEFAULT_CACHE_DIR, "uploads")
+# صور الصفحات الممسوحة التي تنتظر OCR (لملفات موجودة على القرص)
+PAGES_DIR = os.path.join(SPOOL_DIR, "pages")
+# ميزانية الذاكرة لملفات الجلسة الواحدة (ميغابايت)
+SESSION_MEMORY_BUDGET = int(os.environ.get("UNIBRAIN_SESSION_MEMORY_MB", "256")) * 1024 * 1024
+# أكبر ملف يبقى في الذاكرة حتى لو سمحت الميزانية
+IN_MEMORY_LIMIT = 8 * 1024 * 1024
+# الملفات على القرص التي لم تُستخدم منذ هذه المدة تُحذف (نفس مدة بقاء المهام في jobs.py)
+KEEP_SECONDS = 24 * 3600
+
+_CHUNK = 1 << 20
+
+
+class MappedFile(io.RawIOBase):
+    """ملف للقراءة فوق mmap؛ mmap وحده ليس io stream فترفضه pypdfium2 (صور صفحات PDF)"""
+
+    def __init__(self, mm):
+        self._mm = mm
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), len(self._mm) - self._pos))
+        buffer[:n] = self._mm[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: len(self._mm)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+@contextmanager
+def open_source(source):
+    """ملف للقراءة من (بايتات أو مسار): المسار يُفتح كـ mmap فلا يُقرأ إلا ما يُطلب منه"""
+    if not isinstance(source, str):
+        yield io.BytesIO(source)
+        return
+    with open(source, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            # لا يمكن عمل mmap لملف فارغ
+            yield io.BytesIO(b"")
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, MappedFile(mm) as mapped:
+            yield mapped
+
+
+def file_sha256(path):
+    """بصمة SHA-256 لملف على القرص بقراءته على دفعات (تساوي content_hash للبايتات)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def spool_image(image, directory=PAGES_DIR):
+    """حفظ صورة PIL كملف PNG مؤقت وإرجاع مساره"""
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".png")
+    with os.fdopen(fd, "wb") as fh:
+        image.save(fh, format="PNG")
+    return path
+
+
+def discard(paths):
+    """حذف ملفات مؤقتة انتهى استخدامها (صور الصفحات بعد OCR)"""
+    for path in paths:
+        if isinstance(path, str):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class MemoryBudget:
+    """عدّاد بايتات محجوزة في الذاكرة؛ الحجز يفشل بدل تجاوز الحد"""
+
+    def __init__(self, limit=SESSION_MEMORY_BUDGET):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_reserve(self, size):
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.used = max(0, self.used - size)
+
+
+class StoredFile:
+    """ملف مرفوع: في الذاكرة (data) أو على القرص (path)"""
+
+    def __init__(self, name, size, sha256, data=None, path=None):
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self.data = data
+        self.path = path
+
+    @property
+    def source(self):
+        """ما يُمرر لدوال الاستخراج: البايتات أو المسار"""
+        return self.data if self.data is not None else self.path
+
+    @property
+    def on_disk(self):
+        return self.data is None
+
+
+class UploadStore:
+    """ملفات جلسة واحدة ضمن ميزانية ذاكرة.
+
+    الملفات على القرص تُسمى ببصمتها، فالملف نفسه المرفوع من جلستين يُكتب مرة
+    واحدة، ولا تُحذف إلا بعد KEEP_SECONDS من آخر استخدام (قد تكون مهمة استخراج
+    لجلسة أخرى ما زالت تقرأ منها).
+    """
+
+    def __init__(self, budget=None, directory=SPOOL_DIR, in_memory_limit=IN_MEMORY_LIMIT):
+        self.budget = budget if budget is not None else MemoryBudget()
+        self.directory = directory
+        self.in_memory_limit = in_memory_limit
+        self.files = []
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, name, fileobj):
+        """حفظ ملف من كائن قابل للقراءة (UploadedFile في Streamlit مثلاً)"""
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+        if size <= self.in_memory_limit and self.budget.try_reserve(size):
+            data = fileobj.read()
+            stored = StoredFile(name, size, hashlib.sha256(data).hexdigest(), data=data)
+        else:
+            stored = self._spool(name, fileobj, size)
+        self.files.append(stored)
+        return stored
+
+    def _spool(self, name, fileobj, size):
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in iter(lambda: fileobj.read(_CHUNK), b""):
+                    h.update(chunk)
+                    fh.write(chunk)
+            digest = h.hexdigest()
+            ext = os.path.splitext(name)[1].lower()
+            path = os.path.join(self.directory, digest + ext)
+            if os.path.exists(path):
+                os.remove(tmp)
+                os.utime(path)
+            else:
+                os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return StoredFile(name, size, digest, path=path)
+
+    def clear(self):
+        """تحرير ملفات الجلسة من الميزانية (عند رفع مجموعة ملفات جديدة)"""
+        for stored in self.files:
+            if not stored.on_disk:
+                self.budget.release(stored.size)
+        self.files = []
+
+    def prune(self, keep_seconds=KEEP_SECONDS):
+        """حذف الملفات وصور الصفحات التي لم تُستخدم منذ keep_seconds"""
+        cutoff = time.time() - keep_seconds
+        for directory in (self.directory, PAGES_DIR):
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
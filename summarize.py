@@ -0,0 +1,198 @@
+"""تلخيص المستندات الطويلة بأسلوب map-reduce فوق pipeline("summarization").
+
+النص يُقسم إلى أجزاء بحدود الجمل والعناوين وبميزانية من التوكنات، تُلخص
+الأجزاء على دفعات، ثم تُلخص الملخصات حتى نصل إلى ملخص واحد.
+"""
+import re
+import time
+
+import tracing
+from cache import content_hash
+
+# حد DistilBART هو 1024 توكن للمدخل، نترك هامشاً للتوكنات الخاصة
+DEFAULT_CHUNK_TOKENS = 900
+DEFAULT_BATCH_SIZE = 4
+# أطوال ملخصات مرحلة map المسموحة: نختار من قائمة ثابتة حتى لا يتغير مفتاح الكاش
+# لكل الأجزاء عندما يتغير عددها قليلاً بعد تعديل النص
+MAP_LENGTHS = (150, 100, 60, 30)
+# غيّر هذا الرقم عند تعديل طريقة التلخيص حتى لا تُستخدم ملخصات قديمة من الكاش
+SUMMARIZER_VERSION = "1"
+
+# لا نقسم بعد ترقيم القوائم مثل "1. "
+_SENTENCE_END = re.compile(r"(?<!\b\d\.)(?<=[.!?؟۔])\s+")
+_HEADING = re.compile(r"^\s*(--- .+ ---|#{1,6}\s.+|\d+(\.\d+)*[.)]?\s+\S.{0,80})(?<![.!?؟:،,])\s*$")
+
+
+def split_sentences(text):
+    """تقسيم سطر أو فقرة إلى جمل"""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def iter_units(text):
+    """(جملة، هل هي عنوان، هل تنهي فقرة) لكل جملة في النص بالترتيب"""
+    for block in re.split(r"\n\s*\n|\n(?=--- )", text):
+        lines = [line for line in block.split("\n") if line.strip()]
+        if not lines:
+            continue
+        units = []
+        if _HEADING.match(lines[0]):
+            units.append((lines[0].strip(), True))
+            lines = lines[1:]
+        for sentence in _SENTENCE_END.split(" ".join(line.strip() for line in lines)):
+            if sentence.strip():
+                units.append((sentence.strip(), False))
+        for i, (sentence, heading) in enumerate(units):
+            yield sentence, heading, i == len(units) - 1
+
+
+def split_units(text):
+    """تقسيم النص إلى (جملة، هل تبدأ بعنوان)"""
+    return [(sentence, heading) for sentence, heading, _ in iter_units(text)]
+
+
+def token_counts(tokenizer, texts):
+    """عدد التوكنات لكل نص (دفعة واحدة عبر الـ tokenizer)"""
+    if not texts:
+        return []
+    if tokenizer is None:
+        # تقدير تقريبي عند عدم توفر tokenizer
+        return [int(len(t.split()) * 1.3) + 1 for t in texts]
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+
+def _split_long(sentence, count, max_tokens):
+    """جملة أطول من الميزانية تُقسم على الكلمات"""
+    words = sentence.split()
+    parts = max(2, -(-count // max_tokens))
+    step = -(-len(words) // parts)
+    return [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+
+
+def sentence_pieces(sentence, count, max_tokens):
+    """(جزء، عدد توكناته): الجملة كما هي، أو مقسمة إذا تجاوزت max_tokens"""
+    if count <= max_tokens:
+        return [(sentence, count)]
+    return [(p, int(count * len(p) / max(len(sentence), 1)) + 1) for p in _split_long(sentence, count, max_tokens)]
+
+
+def chunk_text(text, tokenizer=None, max_tokens=DEFAULT_CHUNK_TOKENS, split_headings=True):
+    """تجميع الجمل في أجزاء لا تتجاوز max_tokens، وبدء جزء جديد عند كل عنوان"""
+    units = split_units(text)
+    if not split_headings:
+        units = [(u, False) for u, _ in units]
+    counts = token_counts(tokenizer, [u for u, _ in units])
+    chunks, current, used = [], [], 0
+    for (sentence, heading), count in zip(units, counts):
+        for piece, piece_count in sentence_pieces(sentence, count, max_tokens):
+            if current and (used + piece_count > max_tokens or heading):
+                chunks.append(" ".join(current))
+                current, used = [], 0
+            heading = False
+            current.append(piece)
+            used += piece_count
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _lead(text, max_tokens, tokenizer=None):
+    """ملخص استخراجي رخيص: أول كلمات الجزء (يُستخدم عند نفاد الوقت).
+
+    الطول بالتوكنات مثل max_length وميزانية الأجزاء، وليس أكثر من نصف توكنات
+    الجزء نفسه: في العربية قد تصبح الكلمة الواحدة 4 توكنات أو أكثر، فلو قُص
+    بعدد الكلمات لبقي الجزء كما هو ولم يتقلص عدد الأجزاء في المستوى التالي.
+    """
+    words = text.split()
+    counts = token_counts(tokenizer, words)
+    limit = min(max_tokens, sum(counts) // 2)
+    used = 0
+    for n, count in enumerate(counts):
+        used += count
+        if used > limit:
+            return " ".join(words[:max(n, 1)])
+    return text
+
+
+def model_name(summarizer):
+    if getattr(summarizer, "model_id", None):
+        return summarizer.model_id
+    model = getattr(summarizer, "model", None)
+    return getattr(model, "name_or_path", None) or type(summarizer).__name__
+
+
+def summary_key(summarizer, chunk, max_length, min_length):
+    """مفتاح الكاش: اسم النموذج + معاملات التوليد + بصمة الجزء"""
+    return content_hash(chunk, SUMMARIZER_VERSION, model_name(summarizer), max_length, min_length, "greedy")
+
+
+def summarize_chunks(summarizer, chunks, max_length, min_length, batch_size=DEFAULT_BATCH_SIZE,
+                     deadline=None, on_progress=None, level=1, cache=None):
+    """تلخيص قائمة أجزاء على دفعات؛ بعد تجاوز الموعد النهائي تُستخدم بداية كل جزء بدلاً من النموذج.
+
+    الأجزاء الموجودة في الكاش لا يعاد تلخيصها، فيمر على النموذج ما تغير فقط.
+    """
+    summaries = [None] * len(chunks)
+    keys = [summary_key(summarizer, c, max_length, min_length) for c in chunks]
+    if cache is not None:
+        summaries = [cache.get(k) for k in keys]
+    missing = [i for i, s in enumerate(summaries) if s is None]
+    done = len(chunks) - len(missing)
+    if cache is not None:
+        tracing.cache_result("summaries", hits=done, misses=len(missing))
+    if on_progress and done:
+        on_progress(done, len(chunks), level)
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        if deadline is not None and time.monotonic() > deadline:
+            # الاختصار الاستخراجي لا يُخزن حتى يُلخص بالنموذج في المرة القادمة
+            for i in batch:
+                summaries[i] = _lead(chunks[i], max_length, getattr(summarizer, "tokenizer", None))
+        else:
+            texts = [chunks[i] for i in batch]
+            tokens = sum(token_counts(getattr(summarizer, "tokenizer", None), texts))
+            with tracing.span("summarize", chunks=len(texts), characters=sum(map(len, texts)), tokens=tokens):
+                out = summarizer(texts, max_length=max_length, min_length=min_length,
+                                 do_sample=False, truncation=True, batch_size=batch_size)
+            for i, o in zip(batch, out):
+                summaries[i] = o["summary_text"]
+                if cache is not None:
+                    cache.set(keys[i], summaries[i])
+        done += len(batch)
+        if on_progress:
+            on_progress(done, len(chunks), level)
+    return summaries
+
+
+def summarize_document(summarizer, text, max_length=150, min_length=40, chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                       batch_size=DEFAULT_BATCH_SIZE, time_budget=None, on_progress=None, cache=None,
+                       chunker=chunk_text):
+    """تلخيص المستند كاملاً.
+
+    time_budget: عدد الثواني المتاحة؛ الأجزاء المتبقية بعده تُختصر استخراجياً
+    حتى يبقى المستند كله ممثلاً في الملخص النهائي.
+    on_progress(done, total, level): يُستدعى بعد كل دفعة.
+    cache: كاش (get/set) لملخصات الأجزاء، مثل cache.TieredCache.
+    chunker: دالة التقسيم بنفس توقيع chunk_text (مثل incremental.stable_chunks).
+    """
+    tokenizer = getattr(summarizer, "tokenizer", None)
+    deadline = time.monotonic() + time_budget if time_budget else None
+    chunks = chunker(text, tokenizer, chunk_tokens)
+    if not chunks:
+        return ""
+    level = 1
+    while len(chunks) > 1:
+        # ملخصات الأجزاء تُقصّر كلما زاد عددها حتى يتسع مجموعها لمدخل واحد
+        fit = chunk_tokens // len(chunks)
+        map_length = min(max_length, next((n for n in MAP_LENGTHS if n <= fit), MAP_LENGTHS[-1]))
+        summaries = summarize_chunks(summarizer, chunks, map_length, min(min_length, map_length // 2),
+                                     batch_size, deadline, on_progress, level, cache)
+        # العناوين لا تعني شيئاً داخل الملخصات، ونتجاهلها حتى يتقلص عدد الأجزاء في كل مستوى
+        reduced = chunker("\n\n".join(summaries), tokenizer, chunk_tokens, split_headings=False)
+        if len(reduced) >= len(chunks):
+            # المستوى لم يُقلص عدد الأجزاء (اختصارات بعد نفاد الوقت): نكتفي بها بدل الدوران بلا نهاية
+            return "\n\n".join(summaries)
+        chunks = reduced
+        level += 1
+    final = summarize_chunks(summarizer, chunks, max_length, min_length, batch_size,
+                             None, on_progress, level, cache)
+    return final[0]
@@ -0,0 +1,32 @@
+import io
+import zipfile
+
+import ooxml
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+
+def _docx(body):
+    xml = (f'<w:document xmlns:w="{W}" xmlns:mc="{MC}"><w:body>{body}</w:body></w:document>')
+    bio = io.BytesIO()
+    with zipfile.ZipFile(bio, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+    return bio.getvalue()
+
+
+def _p(text):
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def test_table_inside_fallback_does_not_drop_later_text():
+    fallback_table = f"<w:tbl><w:tr><w:tc>{_p('Fallback cell')}</w:tc></w:tr></w:tbl>"
+    body = (_p("Before")
+            + "<w:p><w:r><mc:AlternateContent>"
+            + f"<mc:Choice><w:txbxContent>{_p('Choice text')}</w:txbxContent></mc:Choice>"
+            + f"<mc:Fallback><w:txbxContent>{fallback_table}{_p('Fallback text')}</w:txbxContent></mc:Fallback>"
+            + "</mc:AlternateContent></w:r></w:p>"
+            + _p("After")
+            + f"<w:tbl><w:tr><w:tc>{_p('a')}</w:tc><w:tc>{_p('b')}</w:tc></w:tr></w:tbl>"
+            + _p("Last"))
+    assert [text for _, text in ooxml.docx_units(_docx(body))] == ["Before", "Choice text", "After", "a | b", "Last"]
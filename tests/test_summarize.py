@@ -0,0 +1,32 @@
+from summarize import summarize_document
+
+
+class DenseTokenizer:
+    """4 توكنات لكل كلمة، مثل العربية في BPE الخاص بـ DistilBART"""
+
+    def __call__(self, texts, add_special_tokens=True):
+        return {"input_ids": [[0] * (4 * len(t.split())) for t in texts]}
+
+
+class FakeSummarizer:
+    tokenizer = DenseTokenizer()
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, max_length, **kwargs):
+        self.calls += 1
+        return [{"summary_text": " ".join(t.split()[:max_length // 4])} for t in texts]
+
+
+def test_deadline_with_token_dense_text_finishes():
+    text = "\n\n".join(" ".join(f"كلمة{p}_{i}" for i in range(40)) + "." for p in range(200))
+    levels = []
+
+    def on_progress(done, total, level):
+        levels.append(level)
+        assert level < 20, "map-reduce did not converge"
+
+    summary = summarize_document(FakeSummarizer(), text, time_budget=1e-9, on_progress=on_progress)
+    assert summary
+    assert len(FakeSummarizer.tokenizer([summary])["input_ids"][0]) < len(text.split()) * 4
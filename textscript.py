@@ -0,0 +1,7 @@
+"""أنماط الحروف العربية واللاتينية المشتركة بين OCR والترجمة والتصدير."""
+import re
+
+# العربية وملحقاتها وأشكال العرض (presentation forms) كما تخرج من بعض ملفات PDF
+ARABIC = re.compile(r"[\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff\ufe70-\ufeff]")
+# اللاتينية مع الحروف المشكّلة (é, ü...)
+LATIN = re.compile(r"[A-Za-z\u00c0-\u024f]")
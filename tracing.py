@@ -0,0 +1,165 @@
+"""قياس زمن كل مرحلة (تحليل الملفات، OCR، تحميل النماذج، التلخيص، الترجمة، التصدير).
+
+كل مرحلة تسجل المدة، حجم المدخل (صفحات، بكسلات، أحرف، توكنات...)، وإصابات الكاش
+في سجل مشترك داخل العملية. السجل يُعرض في لوحة الأداء في app.py ويُصدّر بصيغة
+نصوص Prometheus؛ إذا حُدد UNIBRAIN_METRICS_FILE يُكتب الملف دورياً لقارئ محلي
+(مثل textfile collector في node_exporter).
+
+    with tracing.span("ocr", images=len(images)) as s:
+        texts = read(images)
+        s.add(characters=sum(map(len, texts)))
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+METRICS_FILE = os.environ.get("UNIBRAIN_METRICS_FILE")
+# أقل مدة بين كتابتين لملف المقاييس بالثواني
+WRITE_INTERVAL = 5.0
+# حدود الـ histogram بالثواني
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# عدد المدد الأخيرة المحفوظة لكل مرحلة لحساب p50/p95 في اللوحة
+RECENT = 512
+
+
+class StageStats:
+    __slots__ = ("count", "seconds", "max", "buckets", "sizes", "recent", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.sizes = defaultdict(float)
+        self.recent = deque(maxlen=RECENT)
+        self.errors = 0
+
+
+class Span:
+    """مرحلة جارية؛ add() لإضافة أحجام لا تُعرف إلا بعد التنفيذ"""
+
+    def __init__(self, stage, sizes):
+        self.stage = stage
+        self.sizes = dict(sizes)
+
+    def add(self, **sizes):
+        for unit, value in sizes.items():
+            self.sizes[unit] = self.sizes.get(unit, 0) + value
+
+
+class Tracer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = defaultdict(StageStats)
+        self.cache = defaultdict(lambda: [0, 0])
+        self._written = 0.0
+
+    def observe(self, stage, seconds, error=False, **sizes):
+        with self._lock:
+            stats = self.stages[stage]
+            stats.count += 1
+            stats.seconds += seconds
+            stats.max = max(stats.max, seconds)
+            stats.recent.append(seconds)
+            stats.errors += bool(error)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+            for unit, value in sizes.items():
+                stats.sizes[unit] += value
+        self._maybe_write()
+
+    @contextmanager
+    def span(self, stage, **sizes):
+        span = Span(stage, sizes)
+        start = time.perf_counter()
+        error = False
+        try:
+            yield span
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, error, **span.sizes)
+
+    def cache_result(self, name, hits=0, misses=0):
+        with self._lock:
+            counts = self.cache[name]
+            counts[0] += hits
+            counts[1] += misses
+
+    def summary(self):
+        """لقطة للعرض: قائمة قواميس لكل مرحلة + نسب إصابة الكاش"""
+        with self._lock:
+            rows = []
+            for stage, s in sorted(self.stages.items()):
+                recent = sorted(s.recent)
+                row = {
+                    "stage": stage,
+                    "count": s.count,
+                    "total_s": round(s.seconds, 3),
+                    "mean_s": round(s.seconds / s.count, 4),
+                    "p50_s": round(recent[len(recent) // 2], 4),
+                    "p95_s": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 4),
+                    "max_s": round(s.max, 4),
+                    "errors": s.errors,
+                }
+                row.update({unit: int(v) for unit, v in s.sizes.items()})
+                rows.append(row)
+            caches = {name: {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else None}
+                      for name, (h, m) in sorted(self.cache.items())}
+        return rows, caches
+
+    def prometheus(self):
+        """كل المقاييس بصيغة نصوص Prometheus"""
+        lines = [
+            "# HELP unibrain_stage_seconds Duration of each processing stage.",
+            "# TYPE unibrain_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+            for stage, s in stages:
+                for bound, count in zip(BUCKETS, s.buckets):
+                    lines.append(f'unibrain_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'unibrain_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {s.count}')
+                lines.append(f'unibrain_stage_seconds_sum{{stage="{stage}"}} {s.seconds:.6f}')
+                lines.append(f'unibrain_stage_seconds_count{{stage="{stage}"}} {s.count}')
+            lines += ["# HELP unibrain_stage_errors_total Stage runs that raised an exception.",
+                      "# TYPE unibrain_stage_errors_total counter"]
+            lines += [f'unibrain_stage_errors_total{{stage="{stage}"}} {s.errors}' for stage, s in stages]
+            lines += ["# HELP unibrain_stage_input_total Input processed per stage (pages, pixels, characters...).",
+                      "# TYPE unibrain_stage_input_total counter"]
+            for stage, s in stages:
+                for unit, value in sorted(s.sizes.items()):
+                    lines.append(f'unibrain_stage_input_total{{stage="{stage}",unit="{unit}"}} {value:g}')
+            lines += ["# HELP unibrain_cache_requests_total Cache lookups by result.",
+                      "# TYPE unibrain_cache_requests_total counter"]
+            for name, (hits, misses) in sorted(self.cache.items()):
+                lines.append(f'unibrain_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+                lines.append(f'unibrain_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """كتابة ذرية (ملف مؤقت ثم replace) حتى لا يقرأ الـ scraper ملفاً نصف مكتوب"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def _maybe_write(self):
+        if not METRICS_FILE or time.monotonic() - self._written < WRITE_INTERVAL:
+            return
+        self._written = time.monotonic()
+        try:
+            self.write_textfile(METRICS_FILE)
+        except OSError:
+            pass
+
+
+# سجل واحد لكل العملية (كل الجلسات والمهام)
+TRACER = Tracer()
+span = TRACER.span
+observe = TRACER.observe
+cache_result = TRACER.cache_result
@@ -0,0 +1,142 @@
+"""الترجمة بين العربية والإنجليزية: نموذج محلي (MarianMT) أو googletrans كخيار إضافي.
+
+النص يُقسم إلى جمل، وكل جملة تُترجم مرة واحدة فقط (كاش لكل جملة)،
+والجمل الجديدة تُترجم على دفعات مرتبة حسب الطول لتقليل الحشو (padding).
+"""
+import threading
+
+import tracing
+from cache import content_hash
+from summarize import split_sentences
+from textscript import ARABIC, LATIN
+
+
+def detect_language(text):
+    """'ar' أو 'en' حسب الحروف الغالبة، أو None إذا لم توجد حروف"""
+    ar = len(ARABIC.findall(text))
+    en = len(LATIN.findall(text))
+    if not ar and not en:
+        return None
+    return 'ar' if ar >= en else 'en'
+
+
+class TranslationBackend:
+    """الواجهة المشتركة: الفئات الفرعية تنفذ translate_batch فقط"""
+
+    name = "base"
+    batch_size = 16
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def translate_batch(self, sentences, src, dest):
+        raise NotImplementedError
+
+    def model_id(self, src, dest):
+        return self.name
+
+    def _key(self, sentence, src, dest):
+        return content_hash(sentence, self.model_id(src, dest), src, dest)
+
+    def translate(self, text, dest, on_progress=None):
+        """ترجمة نص كامل مع الحفاظ على تقسيم الأسطر"""
+        lines = text.split("\n")
+        parts = [split_sentences(line) for line in lines]
+
+        # الجمل المطلوب ترجمتها مجمعة حسب لغة المصدر
+        translated = {}
+        pending = {}
+        hits = 0
+        for sentence in {s for sentences in parts for s in sentences}:
+            src = detect_language(sentence)
+            if src is None or src == dest:
+                translated[sentence] = sentence
+                continue
+            cached = self.cache.get(self._key(sentence, src, dest)) if self.cache is not None else None
+            if cached is not None:
+                translated[sentence] = cached
+                hits += 1
+            else:
+                pending.setdefault(src, []).append(sentence)
+
+        total = sum(len(v) for v in pending.values())
+        if self.cache is not None:
+            tracing.cache_result("translations", hits=hits, misses=total)
+        done = 0
+        for src, sentences in pending.items():
+            sentences.sort(key=len)
+            for start in range(0, len(sentences), self.batch_size):
+                batch = sentences[start:start + self.batch_size]
+                with tracing.span(f"translate_{self.name}", sentences=len(batch), characters=sum(map(len, batch))):
+                    results = self.translate_batch(batch, src, dest)
+                for sentence, result in zip(batch, results):
+                    translated[sentence] = result
+                    if self.cache is not None:
+                        self.cache.set(self._key(sentence, src, dest), result)
+                done += len(batch)
+                if on_progress:
+                    on_progress(done, total)
+
+        return "\n".join(" ".join(translated[s] for s in sentences) for sentences in parts)
+
+
+class MarianBackend(TranslationBackend):
+    """ترجمة محلية بدون إنترنت عبر نماذج Helsinki-NLP (MarianMT)"""
+
+    name = "marian"
+    MODELS = {
+        ('ar', 'en'): "Helsinki-NLP/opus-mt-ar-en",
+        ('en', 'ar'): "Helsinki-NLP/opus-mt-en-ar",
+    }
+
+    def __init__(self, cache=None, batch_size=16, max_length=512):
+        super().__init__(cache)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model_id(self, src, dest):
+        return self.MODELS[(src, dest)]
+
+    def _load(self, src, dest):
+        with self._lock:
+            return self._load_locked(src, dest)
+
+    def _load_locked(self, src, dest):
+        if (src, dest) not in self._models:
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+            name = self.MODELS[(src, dest)]
+            tokenizer = AutoTokenizer.from_pretrained(name)
+            model = AutoModelForSeq2SeqLM.from_pretrained(name).eval()
+            self._models[(src, dest)] = (tokenizer, model)
+        return self._models[(src, dest)]
+
+    def translate_batch(self, sentences, src, dest):
+        import torch
+        tokenizer, model = self._load(src, dest)
+        inputs = tokenizer(sentences, return_tensors="pt", padding=True, truncation=True,
+                           max_length=self.max_length)
+        with torch.inference_mode():
+            output = model.generate(**inputs, num_beams=1, max_new_tokens=self.max_length)
+        return tokenizer.batch_decode(output, skip_special_tokens=True)
+
+
+class GoogleBackend(TranslationBackend):
+    """googletrans (يحتاج إنترنت، وقد يتوقف بسبب حدود الطلبات)"""
+
+    name = "google"
+
+    def __init__(self, cache=None):
+        super().__init__(cache)
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, sentences, src, dest):
+        return [r.text for r in self.translator.translate(sentences, src=src, dest=dest)]
+
+
+BACKENDS = {
+    "marian": MarianBackend,
+    "google": GoogleBackend,
+}